@@ -8,6 +8,11 @@ console = Console()
 
 
 class StrategyResolver(StrategyCoreResolver):
+    def __init__(self, manager):
+        super().__init__(manager)
+        ## OXSOLID is a constant of the strategy, read on first use
+        self.oxSolid = None
+
     def get_strategy_destinations(self):
         """
         Track balances for all strategy implementations
@@ -24,9 +29,12 @@ class StrategyResolver(StrategyCoreResolver):
         super().add_balances_snap(calls, entities)
         strategy = self.manager.strategy
 
-        oxSolid = interface.IERC20(strategy.OXSOLID())
+        if self.oxSolid is None:
+            self.oxSolid = interface.IERC20(strategy.OXSOLID())
 
-        calls = self.add_entity_balances_for_tokens(calls, "oxSolid", oxSolid, entities)
+        calls = self.add_entity_balances_for_tokens(
+            calls, "oxSolid", self.oxSolid, entities
+        )
 
         return calls
 
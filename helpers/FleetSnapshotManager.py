@@ -0,0 +1,241 @@
+from brownie import chain, web3
+from rich.console import Console
+
+from helpers.multicall import Call, Multicall, as_wei, func
+from helpers.multicall.call import checksum_address
+from helpers.snapshot.snap import Snap, SnapSchema
+from helpers.snapshot.history import SnapshotHistory
+from helpers.StrategyCoreResolver import SETT_SNAP_FIELDS, STRATEGY_SNAP_FIELDS
+from helpers.SnapshotManager import MAX_CALLS_PER_BATCH, snap_block_hash
+
+"""
+  Snapshots of many sett / strategy pairs in one pass
+  Entities of every vault are discovered with a single multicall, each block is one batched multicall
+  Vaults sharing a token and an account (same want, same treasury...) share the balanceOf call
+  fleetSnap.vault(key) is a regular Snap with the keys of that vault's SnapshotManager snaps
+"""
+
+console = Console()
+
+## (contract, view, kind, key) read from every vault at discovery, a view the strategy
+## doesn't implement (reverts) is skipped for that vault
+DISCOVERY = [
+    ("sett", func.sett.token, "tokens", "want"),
+    ("strategy", func.strategy.want, "strategyWant", "want"),
+    ("strategy", func.strategy.OXSOLID, "tokens", "oxSolid"),
+    ("strategy", func.strategy.governance, "entities", "governance"),
+    ("sett", func.sett.treasury, "entities", "treasury"),
+    ("strategy", func.strategy.strategist, "entities", "strategist"),
+    ("strategy", func.strategy.LOCKER, "entities", "locker"),
+    ("sett", func.sett.badgerTree, "entities", "badgerTree"),
+]
+
+
+def balance_key(token, account):
+    return "balanceOf." + token + "." + account
+
+
+class FleetVault:
+    def __init__(self, key, sett, strategy):
+        self.key = key
+        self.sett = checksum_address(getattr(sett, "address", sett))
+        self.strategy = checksum_address(getattr(strategy, "address", strategy))
+        self.prefix = "vaults." + key + "."
+        ## tokenKey -> address, entityKey -> address, as the vault's SnapshotManager names them
+        self.tokens = {"want": None, "sett": self.sett}
+        self.entities = {"sett": self.sett, "strategy": self.strategy}
+        ## Key layout of this vault's snaps
+        self.schema = SnapSchema()
+
+    def accounts(self, trackedUsers=None):
+        entities = dict(self.entities)
+        for key, user in (trackedUsers or {}).items():
+            entities[key] = checksum_address(getattr(user, "address", user))
+        return entities
+
+    def keys(self, entities):
+        """
+        [(vault snap key, fleet snap key)]
+        """
+        keys = [
+            (key, self.prefix + key)
+            for key, _ in SETT_SNAP_FIELDS + STRATEGY_SNAP_FIELDS
+        ]
+        for tokenKey, token in self.tokens.items():
+            for entityKey, entity in entities.items():
+                keys.append(
+                    (
+                        "balances." + tokenKey + "." + entityKey,
+                        balance_key(token, entity),
+                    )
+                )
+        return keys
+
+    def view(self, fleetSnap, trackedUsers=None):
+        """
+        This vault's Snap out of the fleet's Snap of a block
+        """
+        entities = self.accounts(trackedUsers)
+        failed = set(fleetSnap.failedKeys)
+        data = {}
+        failedKeys = []
+        for key, fleetKey in self.keys(entities):
+            if fleetSnap.has(fleetKey):
+                data[key] = fleetSnap.get(fleetKey)
+            if fleetKey in failed:
+                failedKeys.append(key)
+        return Snap(
+            data,
+            fleetSnap.block,
+            list(entities),
+            failedKeys,
+            entities,
+            self.schema,
+        )
+
+
+class FleetSnap:
+    """
+    Fleet snapshot of one block, vault Snaps are built on first access
+    """
+
+    def __init__(self, fleet, snap, trackedUsers=None):
+        self.fleet = fleet
+        self.snap = snap
+        self.trackedUsers = trackedUsers
+        self.views = {}
+
+    @property
+    def block(self):
+        return self.snap.block
+
+    def vault(self, key):
+        if key not in self.views:
+            self.views[key] = self.fleet.vaults[key].view(self.snap, self.trackedUsers)
+        return self.views[key]
+
+    def __getitem__(self, key):
+        return self.vault(key)
+
+    def items(self):
+        for key in self.fleet.vaults:
+            yield key, self.vault(key)
+
+
+class FleetSnapshotManager:
+    def __init__(self, vaults, cache=None, maxSnaps=None, spillDir=None):
+        """
+        vaults: key -> (sett, strategy), contracts or addresses
+        cache, maxSnaps and spillDir are as for SnapshotManager
+        """
+        self.cache = cache
+        self.vaults = {
+            key: FleetVault(key, sett, strategy)
+            for key, (sett, strategy) in vaults.items()
+        }
+        self.snaps = SnapshotHistory(maxSnaps, spillDir)
+        ## Key layout shared by all fleet snaps
+        self.schema = SnapSchema()
+        ## block -> (block hash, tracked users) the snap stored for that block was taken with
+        self.snapKeys = {}
+        self.discover()
+
+    def discover(self):
+        """
+        Reads the tokens and entities of every vault in one multicall
+        """
+        calls = []
+        outputs = {}
+        for vault in self.vaults.values():
+            for contract, function, kind, key in DISCOVERY:
+                name = vault.prefix + kind + "." + key
+                outputs[name] = (vault, kind, key)
+                calls.append(Call(getattr(vault, contract), [function], [[name, None]]))
+
+        multi = Multicall(
+            calls,
+            max_calls_per_batch=MAX_CALLS_PER_BATCH,
+            require_success=False,
+            cache=self.cache,
+        )
+        data = multi()
+        failed = set(multi.failed)
+        for name, (vault, kind, key) in outputs.items():
+            if name in failed:
+                continue
+            address = checksum_address(data[name])
+            if kind == "strategyWant":
+                assert (
+                    vault.tokens["want"] == address
+                ), "{}: sett and strategy want differ".format(vault.key)
+            else:
+                getattr(vault, kind)[key] = address
+
+        for vault in self.vaults.values():
+            assert vault.tokens["want"] is not None, "{}: no want".format(vault.key)
+
+    def add_snap_calls(self, trackedUsers=None):
+        calls = []
+        ## (token, account) -> Call, one per pair however many vaults track it
+        balanceCalls = {}
+        for vault in self.vaults.values():
+            for key, function in SETT_SNAP_FIELDS:
+                calls.append(
+                    Call(vault.sett, [function], [[vault.prefix + key, as_wei]])
+                )
+            for key, function in STRATEGY_SNAP_FIELDS:
+                calls.append(
+                    Call(vault.strategy, [function], [[vault.prefix + key, as_wei]])
+                )
+            for token in vault.tokens.values():
+                for account in vault.accounts(trackedUsers).values():
+                    if (token, account) not in balanceCalls:
+                        balanceCalls[(token, account)] = Call(
+                            token,
+                            [func.erc20.balanceOf, account],
+                            [[balance_key(token, account), as_wei]],
+                        )
+        return calls + list(balanceCalls.values())
+
+    def snap(self, trackedUsers=None, block=None):
+        """
+        FleetSnap pinned to `block` (default: current height)
+        trackedUsers are tracked in every vault, like SnapshotManager.snap's
+        """
+        snapBlock = chain.height if block is None else block
+        tracked = tuple(
+            (key, checksum_address(getattr(user, "address", user)))
+            for key, user in (trackedUsers or {}).items()
+        )
+
+        stored = self.snapKeys.get(snapBlock)
+        if (
+            stored is not None
+            and stored[1] == tracked
+            and snapBlock in self.snaps
+            and stored[0] == web3.eth.get_block(snapBlock)["hash"]
+        ):
+            return FleetSnap(self, self.snaps[snapBlock], trackedUsers)
+
+        multi = Multicall(
+            self.add_snap_calls(trackedUsers),
+            max_calls_per_batch=MAX_CALLS_PER_BATCH,
+            require_success=False,
+            block_identifier=snapBlock,
+            cache=self.cache,
+        )
+        data = multi()
+        if multi.failed:
+            console.print("[yellow]Snap calls failed:[/yellow]", multi.failed)
+        snap = Snap(
+            data,
+            multi.block,
+            list(self.vaults),
+            multi.failed,
+            dict(tracked),
+            self.schema,
+        )
+        self.snaps[snapBlock] = snap
+        self.snapKeys[snapBlock] = (snap_block_hash(multi, snapBlock), tracked)
+
+        return FleetSnap(self, snap, trackedUsers)
@@ -3,24 +3,71 @@ from tabulate import tabulate
 from rich.console import Console
 from helpers.multicall import Multicall
 from helpers.utils import val
+from helpers.token_metadata import tokenMetadata
 
-from helpers.snapshot.snap import Snap
+from helpers.snapshot.snap import BALANCE_FIELDS, Snap, SnapSchema
+from helpers.snapshot.dirty import dirty_calls
+from helpers.snapshot.diff import SnapDiff
+from helpers.snapshot.history import SnapshotHistory
+from helpers.snapshot.export import export_snaps
+from helpers.snapshot.params import ParamCache
 
 from _setup.StrategyResolver import StrategyResolver
 
 console = Console()
 
+## Keeps each aggregate eth_call well under node gas / payload limits
+MAX_CALLS_PER_BATCH = 500
+
+
+def snap_block_hash(multi, block):
+    """
+    Hash of the block a snap's multicall read, as tryBlockAndAggregate returned it
+    Looked up when every value came from the call cache (or was carried forward)
+    """
+    if multi.blockHash is not None:
+        return multi.blockHash
+    return web3.eth.get_block(block)["hash"]
+
 
 class SnapshotManager:
-    def __init__(self, sett, strategy, key):
+    def __init__(
+        self,
+        sett,
+        strategy,
+        key,
+        cache=None,
+        incremental=False,
+        verbose=True,
+        maxSnaps=None,
+        spillDir=None,
+    ):
+        """
+        cache is an optional multicall CallCache for snaps of historical blocks
+        incremental makes the after snap of sett actions only re-read what the tx changed
+        verbose=False keeps printCompare from rendering tables, it still returns the SnapDiff
+        maxSnaps bounds the snaps kept in memory, older ones are spilled to spillDir
+        (a temp dir by default), see SnapshotHistory
+        """
         self.key = key
+        self.verbose = verbose
+        self.cache = cache
+        self.incremental = incremental
         self.sett = sett
         self.strategy = strategy
         self.want = interface.IERC20Detailed(self.sett.token())
         self.resolver = self.init_resolver(self.strategy.getName())
-        self.snaps = {}
+        ## Snap calls, compiled once, see SnapTemplate
+        self.template = self.resolver.snap_template()
+        self.snaps = SnapshotHistory(maxSnaps, spillDir)
+        ## Key layout shared by all snaps of this manager
+        self.schema = SnapSchema()
+        ## block -> (block hash, entities) the snap stored for that block was taken with
+        self.snapKeys = {}
         self.settSnaps = {}
         self.entities = {}
+        ## Fees and decimals, read once and dropped when a tx observed sets them
+        self.params = ParamCache([self.sett.address, self.strategy.address])
 
         assert self.want == self.strategy.want()
 
@@ -36,34 +83,101 @@ class SnapshotManager:
             self.addEntity(key, dest)
 
     def add_snap_calls(self, entities):
-        calls = []
-        calls = self.resolver.add_balances_snap(calls, entities)
-        calls = self.resolver.add_sett_snap(calls)
-        # calls = self.resolver.add_sett_permissions_snap(calls)
-        calls = self.resolver.add_strategy_snap(calls, entities=entities)
-        return calls
-
-    def snap(self, trackedUsers=None):
+        return self.template.calls(entities)
+
+    def snap(self, trackedUsers=None, block=None, previous=None, tx=None):
+        """
+        Snapshot pinned to `block` (default: current height)
+        Snapping the same block with the same entities again is served from snaps
+
+        Given the `previous` Snap and the `tx` since then, only the calls the tx could have
+        changed are re-read, every other value is carried forward from `previous`
+        A `tx` on its own is only observed for parameter setters, see ParamCache
+        """
         print("snap")
-        snapBlock = chain.height
+        if tx is not None:
+            self.observe(tx)
+        snapBlock = chain.height if block is None else block
         entities = self.entities
 
         if trackedUsers:
             for key, user in trackedUsers.items():
                 entities[key] = user
 
+        ## The hash tells apart blocks re-mined at the same height after a revert
+        ## it's only looked up when there is a snap of that block to reuse
+        entityItems = tuple(entities.items())
+        stored = self.snapKeys.get(snapBlock)
+        if (
+            stored is not None
+            and stored[1] == entityItems
+            and snapBlock in self.snaps
+            and stored[0] == web3.eth.get_block(snapBlock)["hash"]
+        ):
+            return self.snaps[snapBlock]
+
         calls = self.add_snap_calls(entities)
-        multi = Multicall(calls)
+        base = None
+        if (
+            previous is not None
+            and tx is not None
+            and previous.schema is self.schema
+            and previous.entities == entities
+        ):
+            calls = dirty_calls(
+                calls, previous, tx, [self.sett.address, self.strategy.address]
+            )
+            base = previous
+        calls, params = self.params.split(calls, snapBlock)
+
+        multi = Multicall(
+            calls,
+            max_calls_per_batch=MAX_CALLS_PER_BATCH,
+            require_success=False,
+            block_identifier=snapBlock,
+            cache=self.cache,
+        )
         # multi.printCalls()
 
         data = multi()
-        self.snaps[snapBlock] = Snap(
+        if multi.failed:
+            console.print("[yellow]Snap calls failed:[/yellow]", multi.failed)
+        self.params.update(data, multi.failed, snapBlock)
+        data.update(params)
+        snap = Snap(
             data,
-            snapBlock,
+            multi.block,
             [x[0] for x in entities.items()],
+            multi.failed,
+            dict(entities),
+            self.schema,
+            base,
         )
-
-        return self.snaps[snapBlock]
+        self.snaps[snapBlock] = snap
+        self.snapKeys[snapBlock] = (snap_block_hash(multi, snapBlock), entityItems)
+
+        return snap
+
+    def snapAfter(self, trackedUsers, before, tx):
+        """
+        Snap after a sett action, incremental from `before` when enabled
+        """
+        if self.incremental:
+            return self.snap(trackedUsers, previous=before, tx=tx)
+        return self.snap(trackedUsers, tx=tx)
+
+    def observe(self, tx):
+        """
+        Drops the cached parameters `tx` set, for txs sent outside the sett* methods
+        """
+        self.params.observe(tx)
+
+    def exportSnaps(self, path, keys=None):
+        """
+        Writes every snap taken so far as columns of .npy files under `path`
+        Load them back with helpers.snapshot.export.SnapshotColumns
+        """
+        export_snaps(self.snaps, path, keys)
 
     def addEntity(self, key, entity):
         self.entities[key] = entity
@@ -77,7 +191,7 @@ class SnapshotManager:
         trackedUsers = {"user": user}
         before = self.snap(trackedUsers)
         tx = self.strategy.tend(overrides)
-        after = self.snap(trackedUsers)
+        after = self.snapAfter(trackedUsers, before, tx)
         if confirm:
             self.resolver.confirm_tend(before, after, tx)
 
@@ -86,7 +200,7 @@ class SnapshotManager:
         trackedUsers = {"user": user}
         before = self.snap(trackedUsers)
         tx = self.strategy.harvest(overrides)
-        after = self.snap(trackedUsers)
+        after = self.snapAfter(trackedUsers, before, tx)
         if confirm:
             self.resolver.confirm_harvest(before, after, tx)
 
@@ -94,8 +208,8 @@ class SnapshotManager:
         user = overrides["from"].address
         trackedUsers = {"user": user}
         before = self.snap(trackedUsers)
-        self.sett.deposit(amount, overrides)
-        after = self.snap(trackedUsers)
+        tx = self.sett.deposit(amount, overrides)
+        after = self.snapAfter(trackedUsers, before, tx)
 
         if confirm:
             self.resolver.confirm_deposit(
@@ -107,8 +221,8 @@ class SnapshotManager:
         trackedUsers = {"user": user}
         userBalance = self.want.balanceOf(user)
         before = self.snap(trackedUsers)
-        self.sett.depositAll(overrides)
-        after = self.snap(trackedUsers)
+        tx = self.sett.depositAll(overrides)
+        after = self.snapAfter(trackedUsers, before, tx)
         if confirm:
             self.resolver.confirm_deposit(
                 before, after, {"user": user, "amount": userBalance}
@@ -118,8 +232,8 @@ class SnapshotManager:
         user = overrides["from"].address
         trackedUsers = {"user": user}
         before = self.snap(trackedUsers)
-        self.sett.earn(overrides)
-        after = self.snap(trackedUsers)
+        tx = self.sett.earn(overrides)
+        after = self.snapAfter(trackedUsers, before, tx)
         if confirm:
             self.resolver.confirm_earn(before, after, {"user": user})
 
@@ -128,7 +242,7 @@ class SnapshotManager:
         trackedUsers = {"user": user}
         before = self.snap(trackedUsers)
         tx = self.sett.withdraw(amount, overrides)
-        after = self.snap(trackedUsers)
+        after = self.snapAfter(trackedUsers, before, tx)
         if confirm:
             self.resolver.confirm_withdraw(
                 before, after, {"user": user, "amount": amount}, tx
@@ -140,64 +254,73 @@ class SnapshotManager:
         userBalance = self.sett.balanceOf(user)
         before = self.snap(trackedUsers)
         tx = self.sett.withdraw(userBalance, overrides)
-        after = self.snap(trackedUsers)
+        after = self.snapAfter(trackedUsers, before, tx)
 
         if confirm:
             self.resolver.confirm_withdraw(
                 before, after, {"user": user, "amount": userBalance}, tx
             )
 
+    def token_for(self, key):
+        """
+        Token the amount under `key` is denominated in, None for keys that aren't amounts
+        """
+        parts = key.split(".", 2)
+        if len(parts) == 3 and parts[0] in BALANCE_FIELDS:
+            return self.template.tokens.get(parts[1], self.want.address)
+        if key == "sett.totalSupply":
+            return self.sett.address
+        if (
+            "balance" in key
+            or key == "sett.available"
+            or key == "sett.getPricePerFullShare"
+            or "stakingRewards.staked" in key
+            or "stakingRewards.earned" in key
+        ):
+            return self.want.address
+        return None
+
     def format(self, key, value):
         if type(value) is int:
-            if "stakingRewards.staked" or "stakingRewards.earned" in key:
-                return val(value)
-            # Ether-scaled balances
-            # TODO: Handle based on token decimals
-            if (
-                "balance" in key
-                or key == "sett.available"
-                or key == "sett.getPricePerFullShare"
-                or key == "sett.totalSupply"
-            ):
-                return val(value)
+            token = self.token_for(key)
+            if token is not None:
+                return val(value, tokenMetadata.decimals(token))
         return value
 
+    def fetchTokenMetadata(self):
+        """
+        Reads the decimals of every snapped token in one multicall, format() then needs no RPC
+        """
+        tokenMetadata.fetch(
+            list(self.template.tokens.values()) + [self.sett.address, self.want.address]
+        )
+
     def diff(self, a, b):
         if type(a) is int and type(b) is int:
             return b - a
         else:
             return "-"
 
+    def compare(self, before: Snap, after: Snap):
+        return SnapDiff(before, after)
+
     def printCompare(self, before: Snap, after: Snap):
+        """
+        Diffs the snaps, the table is only rendered when verbose
+        """
         # self.printPermissions()
-        table = []
+        diff = self.compare(before, after)
+        if not self.verbose:
+            return diff
+
+        self.fetchTokenMetadata()
         console.print(
             "[green]=== Compare: {} Sett {} -> {} ===[/green]".format(
                 self.key, before.block, after.block
             )
         )
-
-        for key, item in before.data.items():
-
-            a = item
-            b = after.get(key)
-
-            # Don't add items that don't change
-            if a != b:
-                table.append(
-                    [
-                        key,
-                        self.format(key, a),
-                        self.format(key, b),
-                        self.format(key, self.diff(a, b)),
-                    ]
-                )
-
-        print(
-            tabulate(
-                table, headers=["metric", "before", "after", "diff"], tablefmt="grid"
-            )
-        )
+        print(diff.render(self.format))
+        return diff
 
     def printPermissions(self):
         # Accounts
@@ -234,6 +357,7 @@ class SnapshotManager:
         table = []
         console.print("[green]=== Status Report: {} Sett ===[green]".format(self.key))
 
+        self.fetchTokenMetadata()
         for key, item in snap.data.items():
             # Don't display 0 balances:
             if "balances" in key and item == 0:
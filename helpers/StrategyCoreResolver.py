@@ -12,10 +12,30 @@ from helpers.utils import (
 )
 from helpers.constants import *
 from helpers.multicall import Call, as_wei, func
+from helpers.snapshot.template import SnapTemplate
 from rich.console import Console
 
 console = Console()
 
+## Snap key -> view read from the sett / strategy, see add_sett_snap and add_strategy_snap
+SETT_SNAP_FIELDS = [
+    ("sett.balance", func.sett.balance),
+    ("sett.available", func.sett.available),
+    ("sett.getPricePerFullShare", func.sett.getPricePerFullShare),
+    ("sett.decimals", func.erc20.decimals),
+    ("sett.totalSupply", func.erc20.totalSupply),
+    ("sett.withdrawalFee", func.sett.withdrawalFee),
+    ("sett.managementFee", func.sett.managementFee),
+    ("sett.lastHarvestedAt", func.sett.lastHarvestedAt),
+    ("sett.performanceFeeGovernance", func.sett.performanceFeeGovernance),
+    ("sett.performanceFeeStrategist", func.sett.performanceFeeStrategist),
+]
+STRATEGY_SNAP_FIELDS = [
+    ("strategy.balanceOfPool", func.strategy.balanceOfPool),
+    ("strategy.balanceOfWant", func.strategy.balanceOfWant),
+    ("strategy.balanceOf", func.strategy.balanceOf),
+]
+
 
 class StrategyCoreResolver:
     def __init__(self, manager):
@@ -55,90 +75,31 @@ class StrategyCoreResolver:
         calls = self.add_entity_balances_for_tokens(calls, "sett", sett, entities)
         return calls
 
+    def snap_template(self):
+        """
+        The snap calls below compiled into a SnapTemplate
+        add_balances_snap is run one entity at a time, add_sett_snap / add_strategy_snap only once
+        """
+        return SnapTemplate(
+            lambda entities: self.add_strategy_snap(
+                self.add_sett_snap([]), entities=entities
+            ),
+            lambda entities: self.add_balances_snap([], entities),
+        )
+
     def add_sett_snap(self, calls):
         sett = self.manager.sett
 
-        calls.append(
-            Call(sett.address, [func.sett.balance], [["sett.balance", as_wei]])
-        )
-        calls.append(
-            Call(sett.address, [func.sett.available], [["sett.available", as_wei]])
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.getPricePerFullShare],
-                [["sett.getPricePerFullShare", as_wei]],
-            )
-        )
-        calls.append(
-            Call(sett.address, [func.erc20.decimals], [["sett.decimals", as_wei]])
-        )
-        calls.append(
-            Call(sett.address, [func.erc20.totalSupply], [["sett.totalSupply", as_wei]])
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.withdrawalFee],
-                [["sett.withdrawalFee", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.managementFee],
-                [["sett.managementFee", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.lastHarvestedAt],
-                [["sett.lastHarvestedAt", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.performanceFeeGovernance],
-                [["sett.performanceFeeGovernance", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                sett.address,
-                [func.sett.performanceFeeStrategist],
-                [["sett.performanceFeeStrategist", as_wei]],
-            )
-        )
+        for key, function in SETT_SNAP_FIELDS:
+            calls.append(Call(sett.address, [function], [[key, as_wei]]))
 
         return calls
 
     def add_strategy_snap(self, calls, entities=None):
         strategy = self.manager.strategy
 
-        calls.append(
-            Call(
-                strategy.address,
-                [func.strategy.balanceOfPool],
-                [["strategy.balanceOfPool", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                strategy.address,
-                [func.strategy.balanceOfWant],
-                [["strategy.balanceOfWant", as_wei]],
-            )
-        )
-        calls.append(
-            Call(
-                strategy.address,
-                [func.strategy.balanceOf],
-                [["strategy.balanceOf", as_wei]],
-            )
-        )
+        for key, function in STRATEGY_SNAP_FIELDS:
+            calls.append(Call(strategy.address, [function], [[key, as_wei]]))
 
         return calls
 
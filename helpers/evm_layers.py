@@ -0,0 +1,125 @@
+import functools
+import itertools
+
+from brownie import chain, web3
+from brownie.exceptions import RPCRequestError
+
+"""
+  Fixture states kept as EVM snapshots, so a test restores its setup with an evm_revert
+  instead of replaying the setup transactions
+  Layers stack like the fixtures (want -> deployed -> setup_strat), each one is built once on top of its parent
+  Ganache drops every snapshot taken after the one it reverts to, such layers are rebuilt the next time they're needed
+"""
+
+BASE = "base"
+
+
+class Layer:
+    __slots__ = ("snapshotId", "blockHash", "order", "value")
+
+    def __init__(self, snapshotId, blockHash, order, value):
+        self.snapshotId = snapshotId
+        self.blockHash = blockHash
+        ## Snapshots taken later are dropped when reverting to this one
+        self.order = order
+        self.value = value
+
+
+class EvmLayers:
+    def __init__(self):
+        ## name -> parent name
+        self.parents = {BASE: None}
+        ## name -> Layer, only layers whose snapshot is still alive
+        self.layers = {}
+        ## Layer the chain is at, None when the chain may have moved since
+        self.current = None
+        self.counter = itertools.count()
+
+    def layer(self, name, parent=BASE):
+        """
+        Decorator for a fixture that builds layer `name` on top of `parent`
+        pytest still sees the fixture's own arguments
+        """
+        self.parents[name] = parent
+
+        def decorator(build):
+            @functools.wraps(build)
+            def fixture(*args, **kwargs):
+                return self.get(name, lambda: build(*args, **kwargs))
+
+            return fixture
+
+        return decorator
+
+    def lineage(self, name):
+        """
+        [name, parent, ..., BASE]
+        """
+        names = []
+        while name is not None:
+            names.append(name)
+            name = self.parents[name]
+        return names
+
+    def deepest(self, names):
+        """
+        The layer among `names` with the most ancestors, BASE if there is none
+        """
+        layers = [name for name in names if name in self.parents]
+        return max(layers, key=lambda name: len(self.lineage(name)), default=BASE)
+
+    def snapshot(self, name, value):
+        self.layers[name] = Layer(
+            chain._take_snapshot(),
+            web3.eth.get_block("latest")["hash"],
+            next(self.counter),
+            value,
+        )
+        self.current = name
+
+    def restore(self, name):
+        """
+        Reverts the chain to the closest layer of name's lineage that is still alive
+        The fixtures of the missing layers then build them on top
+        """
+        for candidate in self.lineage(name):
+            layer = self.layers.get(candidate)
+            if layer is None:
+                continue
+            try:
+                layer.snapshotId = chain._revert(layer.snapshotId)
+            except RPCRequestError:
+                ## Snapshot id the node doesn't know (anymore)
+                del self.layers[candidate]
+                continue
+            ## Reverting to a snapshot ganache already dropped does nothing
+            if web3.eth.get_block("latest")["hash"] != layer.blockHash:
+                del self.layers[candidate]
+                continue
+            ## Every later snapshot is gone now, the retaken one is the newest
+            self.layers = {
+                key: value
+                for key, value in self.layers.items()
+                if value.order < layer.order
+            }
+            layer.order = next(self.counter)
+            self.layers[candidate] = layer
+            self.current = candidate
+            return candidate
+
+        self.snapshot(BASE, None)
+        return BASE
+
+    def get(self, name, build):
+        """
+        Value of layer `name`, built (and snapshotted) if the chain isn't past it already
+        """
+        if self.current is not None and name in self.lineage(self.current):
+            return self.layers[name].value
+        value = build()
+        if self.current == self.parents[name]:
+            self.snapshot(name, value)
+        else:
+            ## Built on top of another branch, e.g. setup_strat after setup_share_math, not reusable
+            self.current = None
+        return value
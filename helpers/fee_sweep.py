@@ -0,0 +1,175 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from dotmap import DotMap
+
+from helpers import shares_math_batch
+from helpers.shares_math import MAX_BPS, SECS_PER_YEAR
+from _setup.config import (
+    PERFORMANCE_FEE_GOVERNANCE,
+    PERFORMANCE_FEE_STRATEGIST,
+    WITHDRAWAL_FEE,
+    MANAGEMENT_FEE,
+)
+
+"""
+  Sweeps fee settings over a grid of vault scenarios
+  For each point one harvest is simulated with shares_math, then annualized:
+  - depositorYield: APR of a depositor that owns every non-fee share, net of the withdrawal fee paid once per holdingPeriod
+  - treasuryRevenue: want per year the treasury receives, from performance + management + withdrawal fees
+"""
+
+## Grid axes, in the order of the surface dimensions
+AXES = [
+    "performanceFeeGovernance",
+    "performanceFeeStrategist",
+    "managementFee",
+    "withdrawalFee",
+    "harvestInterval",
+    "tvl",
+    "grossApr",
+]
+
+VAULT_DECIMALS = 18
+CHUNK_SIZE = 100_000
+
+
+def evaluate(axes, holdingPeriod, start, stop):
+    """
+    Evaluates the flat grid points [start, stop)
+    Module level so it can run in the process pool
+    """
+    shape = [len(axis) for axis in axes]
+    indices = np.unravel_index(np.arange(start, stop), shape)
+    (
+        performanceFeeGovernance,
+        performanceFeeStrategist,
+        managementFee,
+        withdrawalFee,
+        harvestInterval,
+        tvl,
+        grossApr,
+    ) = [np.asarray(axis, dtype=object)[index] for axis, index in zip(axes, indices)]
+
+    ## Vault starts at ppfs 1, the depositor owns the whole supply
+    supply = tvl
+    gain = tvl * grossApr * harvestInterval // SECS_PER_YEAR // MAX_BPS
+    fees = shares_math_batch.get_report_fees(
+        gain,
+        performanceFeeGovernance,
+        performanceFeeStrategist,
+        managementFee,
+        harvestInterval,
+        supply,
+        tvl,
+    )
+    treasuryShares = fees.shares_perf_treasury + fees.shares_management
+    supplyAfter = supply + treasuryShares + fees.shares_perf_strategist
+    balanceAfter = tvl + gain
+    ppfsAfter = balanceAfter * 10**VAULT_DECIMALS // supplyAfter
+
+    depositorValue = shares_math_batch.from_shares_to_want(
+        supply, ppfsAfter, VAULT_DECIMALS
+    )
+    withdrawalFeeWant = shares_math_batch.get_withdrawal_fees_in_want(
+        supply, ppfsAfter, VAULT_DECIMALS, withdrawalFee
+    )
+    treasuryValue = shares_math_batch.from_shares_to_want(
+        treasuryShares, ppfsAfter, VAULT_DECIMALS
+    )
+
+    ## Exact integer math ends here, annualizing is done in floats
+    tvl = tvl.astype(np.float64)
+    harvestsPerYear = SECS_PER_YEAR / harvestInterval.astype(np.float64)
+    exitsPerYear = SECS_PER_YEAR / holdingPeriod
+    periodReturn = depositorValue.astype(np.float64) / tvl - 1
+    depositorYield = (1 + periodReturn) ** harvestsPerYear - 1
+    depositorYield -= withdrawalFeeWant.astype(np.float64) / tvl * exitsPerYear
+    treasuryRevenue = (
+        treasuryValue.astype(np.float64) * harvestsPerYear
+        + withdrawalFeeWant.astype(np.float64) * exitsPerYear
+    )
+    return depositorYield, treasuryRevenue
+
+
+class FeeSweep:
+    def __init__(
+        self,
+        performanceFeeGovernance=(PERFORMANCE_FEE_GOVERNANCE,),
+        performanceFeeStrategist=(PERFORMANCE_FEE_STRATEGIST,),
+        managementFee=(MANAGEMENT_FEE,),
+        withdrawalFee=(WITHDRAWAL_FEE,),
+        harvestInterval=(7 * 24 * 3600,),
+        tvl=(1_000_000 * 10**18,),
+        grossApr=(2_000,),
+        holdingPeriod=SECS_PER_YEAR,
+        max_workers=None,
+        chunkSize=CHUNK_SIZE,
+    ):
+        """
+        Every axis is a sequence of ints, fees and grossApr in bps, harvestInterval in seconds, tvl in want
+        Axes default to the values in _setup/config.py
+        max_workers=1 evaluates in process, None uses a process per CPU
+        """
+        self.axes = [
+            [int(value) for value in axis]
+            for axis in (
+                performanceFeeGovernance,
+                performanceFeeStrategist,
+                managementFee,
+                withdrawalFee,
+                harvestInterval,
+                tvl,
+                grossApr,
+            )
+        ]
+        self.holdingPeriod = holdingPeriod
+        self.max_workers = max_workers
+        self.chunkSize = chunkSize
+
+    @property
+    def shape(self):
+        return tuple(len(axis) for axis in self.axes)
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def run(self):
+        """
+        Returns DotMap(axes, depositorYield, treasuryRevenue), surfaces shaped like the grid
+        """
+        size = len(self)
+        chunks = [
+            (start, min(start + self.chunkSize, size))
+            for start in range(0, size, self.chunkSize)
+        ]
+        depositorYield = np.empty(size)
+        treasuryRevenue = np.empty(size)
+
+        if self.max_workers == 1 or len(chunks) == 1:
+            results = [
+                evaluate(self.axes, self.holdingPeriod, start, stop)
+                for start, stop in chunks
+            ]
+        else:
+            with ProcessPoolExecutor(self.max_workers) as executor:
+                results = executor.map(
+                    evaluate,
+                    *zip(
+                        *[
+                            (self.axes, self.holdingPeriod, start, stop)
+                            for start, stop in chunks
+                        ]
+                    ),
+                )
+                results = list(results)
+
+        for (start, stop), (yields, revenues) in zip(chunks, results):
+            depositorYield[start:stop] = yields
+            treasuryRevenue[start:stop] = revenues
+
+        return DotMap(
+            axes=dict(zip(AXES, self.axes)),
+            depositorYield=depositorYield.reshape(self.shape),
+            treasuryRevenue=treasuryRevenue.reshape(self.shape),
+        )
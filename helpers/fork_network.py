@@ -0,0 +1,142 @@
+import os
+import re
+from functools import lru_cache
+
+import requests
+from brownie._config import CONFIG
+
+from helpers.rpc_recorder import RPCRecorder, RPC_CACHE_MODE, RPC_CACHE_PATH
+
+"""
+  Per worker fork networks for `brownie test -n <workers>`
+  Brownie launches one ganache per xdist worker on port + worker index
+  This moves the workers off the console's port and pins every worker's fork to the same upstream block,
+  so they all test against identical state
+
+  With RPC_CACHE_MODE=record|replay the fork reads the upstream through an RPCRecorder
+"""
+
+## Worker N listens on FORK_PORT_BASE + N (brownie adds N)
+FORK_PORT_BASE = int(os.getenv("FORK_PORT_BASE", 8600))
+
+## Ganache's url@block syntax to fork at a given block
+FORK_BLOCK_PATTERN = re.compile(r"^(.*)@(\d+)$")
+
+## Recorders of this process, kept alive for the whole run
+recorders = {}
+
+
+def network_id():
+    return CONFIG.argv["network"] or CONFIG.settings["networks"]["default"]
+
+
+def split_fork_block(url):
+    """
+    Returns (url, block) for url@block, block is None for a plain url
+    """
+    match = FORK_BLOCK_PATTERN.match(url)
+    if match is None:
+        return url, None
+    return match.group(1), int(match.group(2))
+
+
+def fork_upstream(network):
+    """
+    Returns (upstream url, chainid) the network forks, chainid is None if unknown
+    url is None for networks that don't fork
+    """
+    fork = CONFIG.networks[network].get("cmd_settings", {}).get("fork")
+    if fork is None:
+        return None, None
+    if fork in CONFIG.networks:
+        return (
+            os.path.expandvars(CONFIG.networks[fork]["host"]),
+            CONFIG.networks[fork].get("chainid"),
+        )
+    return os.path.expandvars(fork), None
+
+
+def set_fork(network, url, forkBlock=None):
+    """
+    Points the network's fork at url (at forkBlock if given)
+    """
+    settings = CONFIG.networks[network]
+    cmdSettings = settings["cmd_settings"]
+    _, chainid = fork_upstream(network)
+    ## brownie only copies the chainid over when fork is a network id, it becomes a url here
+    if chainid is not None:
+        settings["chainid"] = chainid
+        cmdSettings.setdefault("chain_id", int(chainid))
+    cmdSettings["fork"] = url if forkBlock is None else "{}@{}".format(url, forkBlock)
+
+
+def upstream_block(url):
+    """
+    Latest block of the upstream node, FORK_BLOCK overrides it
+    """
+    if os.getenv("FORK_BLOCK"):
+        return int(os.getenv("FORK_BLOCK"))
+    response = requests.post(
+        url,
+        json={"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return int(response.json()["result"], 16)
+
+
+@lru_cache()
+def worker_input(network):
+    """
+    Settings the xdist master hands to every worker, computed once per run
+    """
+    url, _ = fork_upstream(network)
+    forkBlock = None
+    if url is not None:
+        url, forkBlock = split_fork_block(url)
+        ## A fork already pinned to a block is left alone
+        if forkBlock is None:
+            forkBlock = upstream_block(url)
+    return {"forkBlock": forkBlock, "forkPortBase": FORK_PORT_BASE}
+
+
+def configure_worker(workerinput):
+    """
+    Rewrites the worker's fork network before brownie launches ganache for it
+    """
+    network = workerinput.get("network") or network_id()
+    url, _ = fork_upstream(network)
+    if url is not None:
+        set_fork(network, split_fork_block(url)[0], workerinput.get("forkBlock"))
+    CONFIG.networks[network]["cmd_settings"]["port"] = workerinput.get(
+        "forkPortBase", FORK_PORT_BASE
+    )
+
+
+def record_fork(network, mode=RPC_CACHE_MODE, path=RPC_CACHE_PATH):
+    """
+    Routes the network's fork through a local RPCRecorder, pinned to a block so the
+    recording stays valid: the url's @block, else FORK_BLOCK, else the upstream's latest block
+    With mode off the fork is only pinned when FORK_BLOCK is set
+    Returns the recorder, None when mode is off or the network doesn't fork
+    """
+    url, _ = fork_upstream(network)
+    if url is None:
+        return None
+    upstream, forkBlock = split_fork_block(url)
+    if forkBlock is None and (mode != "off" or os.getenv("FORK_BLOCK")):
+        if mode == "replay" and not os.getenv("FORK_BLOCK"):
+            raise ValueError(
+                "RPC_CACHE_MODE=replay needs the fork block, set FORK_BLOCK"
+            )
+        forkBlock = upstream_block(upstream)
+
+    if mode == "off":
+        set_fork(network, upstream, forkBlock)
+        return None
+    if network not in recorders:
+        recorder = RPCRecorder(upstream, path, mode, forkBlock)
+        recorders[network] = (recorder, recorder.serve())
+    recorder, proxy = recorders[network]
+    set_fork(network, proxy, forkBlock)
+    return recorder
@@ -0,0 +1,106 @@
+import numpy as np
+
+from helpers.multicall import Call, Multicall, func
+from helpers.vault_simulator import WEEK, LOCK_DURATION
+
+"""
+  Unlock schedule of vlOXD locks, to forecast when MyStrategy can get liquidity back
+  MyStrategy._withdrawSome only frees want through LOCKER.processExpiredLocks,
+  which unlocks every lock with unlockTime <= block.timestamp
+"""
+
+
+class LockSchedule:
+    def __init__(self, amounts, unlockTimes, unlockable=0, block=None):
+        """
+        amounts / unlockTimes: the locks that haven't expired yet
+        unlockable: expired locks that can already be processed
+        """
+        unlockTimes = np.asarray(unlockTimes, dtype=np.int64)
+        order = np.argsort(unlockTimes, kind="stable")
+        self.unlockTimes = unlockTimes[order]
+        ## uint112 amounts don't fit int64, object arrays keep the sums exact
+        self.amounts = np.asarray(amounts, dtype=object).reshape(-1)[order]
+        ## cumulative[i] = unlockable + amounts of locks 0..i-1
+        self.cumulative = np.concatenate(
+            ([unlockable], unlockable + np.cumsum(self.amounts))
+        ).astype(object)
+        self.unlockable = unlockable
+        self.block = block
+
+    @classmethod
+    def from_locked_balances(cls, lockedBalances, block=None):
+        """
+        From the (total, unlockable, locked, locks) locker.lockedBalances(account) returns
+        """
+        _, unlockable, _, locks = lockedBalances
+        return cls(
+            [amount for amount, _, _ in locks],
+            [unlockTime for _, _, unlockTime in locks],
+            unlockable,
+            block,
+        )
+
+    @classmethod
+    def fetch(cls, locker, accounts, block_identifier=None):
+        """
+        Returns {account: LockSchedule} read in one multicall
+        """
+        calls = [
+            Call(
+                locker,
+                [func.vlOxd.lockedBalances, account],
+                [
+                    [key + "." + account, None]
+                    for key in ("total", "unlockable", "locked", "locks")
+                ],
+            )
+            for account in accounts
+        ]
+        multi = Multicall(calls, block_identifier=block_identifier)
+        data = multi()
+        return {
+            account: cls.from_locked_balances(
+                [
+                    data[key + "." + account]
+                    for key in ("total", "unlockable", "locked", "locks")
+                ],
+                multi.block,
+            )
+            for account in accounts
+        }
+
+    def __len__(self):
+        return len(self.unlockTimes)
+
+    @property
+    def total(self):
+        return self.cumulative[-1]
+
+    def withdrawable_at(self, timestamp):
+        """
+        OXD processExpiredLocks would free at `timestamp`, O(log n) per timestamp
+        timestamp may be an array, the result is then an array too
+        """
+        index = np.searchsorted(self.unlockTimes, timestamp, side="right")
+        return self.cumulative[index]
+
+    def unlocks_by_epoch(self, now, horizon=LOCK_DURATION):
+        """
+        Returns (epochs, cumulative) for every weekly epoch start in (now, now + horizon]
+        cumulative[i] is what can be unlocked at epochs[i]
+        """
+        start = now // WEEK * WEEK + WEEK
+        epochs = np.arange(start, now + horizon + 1, WEEK, dtype=np.int64)
+        return epochs, self.withdrawable_at(epochs)
+
+    def time_until(self, amount, now):
+        """
+        Earliest time >= now at which `amount` can be unlocked, None if it never can
+        """
+        index = np.searchsorted(self.cumulative, amount, side="left")
+        if index >= len(self.cumulative):
+            return None
+        if index == 0:
+            return now
+        return max(now, int(self.unlockTimes[index - 1]))
@@ -0,0 +1,69 @@
+import asyncio
+
+from helpers.multicall.call import Call
+from helpers.multicall.multicall import Multicall, is_limit_error
+
+
+class AsyncCall(Call):
+    """
+    Call that goes through an AsyncRPC client instead of brownie's web3
+    """
+
+    async def __call__(self, rpc, args=None, block="latest"):
+        args = args or self.args
+        calldata = self.signature.encode_data(args)
+        if isinstance(block, int):
+            block = hex(block)
+        output = await rpc.eth_call(
+            {"to": self.target, "data": "0x" + calldata.hex()}, block
+        )
+        return self.decode_output(bytes.fromhex(output[2:]))
+
+
+class AsyncMulticall(Multicall):
+    """
+    Multicall whose batches run concurrently on an AsyncRPC client
+    Batching, bisecting and failure handling are the same as Multicall
+    """
+
+    async def aggregate_async(self, rpc, aggregate, batch, block):
+        try:
+            return self.aggregate_results(
+                await aggregate(rpc, self.aggregate_args(batch), block)
+            )
+        except Exception as error:
+            if len(batch) < 2 or not is_limit_error(error):
+                raise
+            if block == "latest":
+                block = await rpc.block_number()
+            middle = len(batch) // 2
+            (number, first), (number, second) = await asyncio.gather(
+                self.aggregate_async(rpc, aggregate, batch[:middle], block),
+                self.aggregate_async(rpc, aggregate, batch[middle:], block),
+            )
+            return number, first + second
+
+    async def __call__(self, rpc, block=None):
+        """
+        block defaults to block_identifier, and to the current block when there are several batches
+        """
+        if block is not None:
+            self.block_identifier = block
+
+        chainId = await rpc.chain_id()
+        multicall = self.aggregate_call(chainId)
+        aggregate = AsyncCall(multicall.target, multicall.function)
+        requests = self.requests()
+        outputs = self.lookup(chainId, requests)
+        pending = [index for index, output in enumerate(outputs) if output is None]
+        batches = self.batches([requests[index] for index in pending])
+
+        block = self.block_identifier
+        if block is None:
+            block = await rpc.block_number() if len(batches) > 1 else "latest"
+
+        results = await asyncio.gather(
+            *[self.aggregate_async(rpc, aggregate, batch, block) for batch in batches]
+        )
+        block = self.fill(chainId, requests, outputs, pending, list(results))
+        return self.merge(block, outputs)
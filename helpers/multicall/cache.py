@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import time
+
+from brownie import network, web3
+from brownie._config import CONFIG
+from platformdirs import user_cache_dir
+
+from helpers.multicall.constants import Network
+from helpers.fork_network import split_fork_block
+
+DEFAULT_PATH = os.path.join(user_cache_dir("badger-vaults"), "calls.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024**2
+## Once over max_bytes, evict down to this share of it so eviction doesn't run on every write
+EVICT_TO = 0.9
+
+## Blocks this far below the head are treated as final, see cacheable
+DEFAULT_CONFIRMATIONS = 64
+## (target, data) pairs per SELECT, under SQLite's bound parameter limit
+LOOKUP_CHUNK = 400
+
+## Local chains can revert and re-mine a block number, their results are never cached
+DEV_CHAIN_IDS = [Network.Forknet, Network.Hardhat]
+## Fork block of a local network that doesn't fork, or forks at a block we can't tell
+NOTHING_FORKED = -1
+
+
+def local_fork_block():
+    """
+    Block the active network forked at when brownie launched it (ganache, anvil, hardhat)
+    NOTHING_FORKED when it doesn't fork or the url has no @block, None for remote networks
+    Forks keep the upstream chain id (ftm-main-fork is 250), so DEV_CHAIN_IDS misses them
+    """
+    active = network.show_active()
+    settings = CONFIG.networks.get(active) if active else None
+    if not settings or "cmd" not in settings:
+        return None
+    fork = settings.get("cmd_settings", {}).get("fork")
+    if fork:
+        _, forkBlock = split_fork_block(str(fork))
+        if forkBlock is not None:
+            return forkBlock
+    return NOTHING_FORKED
+
+
+class CallCache:
+    """
+    Persistent SQLite cache for eth_call results at a pinned block
+    Keyed by chain id, target, calldata and block number, the least recently used rows
+    are evicted once the stored outputs grow past max_bytes
+
+    Only blocks at least `confirmations` below the head are cached, so a reorg can't leave
+    stale results behind. A result is served as-is for as long as it's stored
+    On a local fork only the upstream blocks, up to the fork block, are cached
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_PATH,
+        max_bytes=DEFAULT_MAX_BYTES,
+        confirmations=DEFAULT_CONFIRMATIONS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.confirmations = confirmations
+        ## Highest block known to be `confirmations` deep
+        self.safeBlock = -1
+        ## Blocks above it are mined locally, see local_fork_block, looked up on first use
+        self.forkBlock = None
+        self.forkChecked = False
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calls (
+                chain INTEGER NOT NULL,
+                target TEXT NOT NULL,
+                data BLOB NOT NULL,
+                block INTEGER NOT NULL,
+                output BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                used REAL NOT NULL,
+                PRIMARY KEY (chain, target, data, block)
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS calls_used ON calls (used)")
+        self.db.commit()
+        self.size = self.count_size()
+
+    def count_size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM calls").fetchone()[0]
+
+    def head(self):
+        return web3.eth.block_number
+
+    def cacheable(self, chainId, block):
+        """
+        Only blocks `confirmations` below the head are final enough to be stored for good
+        The head is only looked up again for blocks newer than the last safe one seen
+        """
+        if not isinstance(block, int) or chainId in DEV_CHAIN_IDS:
+            return False
+        if not self.forkChecked:
+            self.forkBlock = local_fork_block()
+            self.forkChecked = True
+        if self.forkBlock is not None and block > self.forkBlock:
+            return False
+        if block > self.safeBlock:
+            self.safeBlock = self.head() - self.confirmations
+        return block <= self.safeBlock
+
+    def get_many(self, chainId, block, requests):
+        """
+        Returns the cached output for each [target, calldata], None on a miss
+        """
+        keys = [(target, bytes(data)) for target, data in requests]
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start : start + LOOKUP_CHUNK]
+                rows = self.db.execute(
+                    "SELECT rowid, target, data, output FROM calls"
+                    " WHERE chain=? AND block=? AND (target, data) IN (VALUES {})".format(
+                        ", ".join(["(?, ?)"] * len(chunk))
+                    ),
+                    [chainId, block] + [value for key in chunk for value in key],
+                ).fetchall()
+                for rowid, target, data, output in rows:
+                    found[(target, bytes(data))] = (rowid, bytes(output))
+            if found:
+                self.db.execute(
+                    "UPDATE calls SET used=? WHERE rowid IN ({})".format(
+                        ", ".join("?" * len(found))
+                    ),
+                    [time.time()] + [rowid for rowid, output in found.values()],
+                )
+                self.db.commit()
+        return [found[key][1] if key in found else None for key in keys]
+
+    def set_many(self, chainId, block, items):
+        """
+        Stores [target, calldata, output] items for the block
+        """
+        now = time.time()
+        rows = [
+            (
+                chainId,
+                target,
+                bytes(data),
+                block,
+                bytes(output),
+                len(data) + len(output),
+                now,
+            )
+            for target, data, output in items
+        ]
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO calls VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.commit()
+            ## Replaced rows make this an over-estimate, evict() recounts exactly
+            self.size += sum(row[5] for row in rows)
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """
+        Drops least recently used rows until the cache is back under EVICT_TO * max_bytes
+        Caller holds the lock
+        """
+        self.size = self.count_size()
+        target = self.max_bytes * EVICT_TO
+        freed = 0
+        rows = self.db.execute("SELECT rowid, size FROM calls ORDER BY used").fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if self.size - freed <= target:
+                break
+            evicted.append((rowid,))
+            freed += size
+        self.db.executemany("DELETE FROM calls WHERE rowid=?", evicted)
+        self.db.commit()
+        self.size -= freed
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM calls")
+            self.db.commit()
+            self.size = 0
+
+    def close(self):
+        self.db.close()
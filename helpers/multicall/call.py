@@ -1,23 +1,32 @@
 # Credit: https://github.com/banteg/multicall.py/blob/master/multicall/call.py
+from functools import lru_cache
+
 from eth_utils import to_checksum_address
 from brownie import web3
-from helpers.multicall import Signature
+from helpers.multicall.signature import get_signature, SIGNATURE_CACHE_SIZE
+
+## Checksumming is a keccak as well, snapshots keep hitting the same few targets
+checksum_address = lru_cache(maxsize=SIGNATURE_CACHE_SIZE)(to_checksum_address)
 
 
 class Call:
     def __init__(self, target, function, returns=None):
-        self.target = to_checksum_address(target)
+        self.target = checksum_address(target)
         if isinstance(function, list):
             self.function, *self.args = function
         else:
             self.function = function
             self.args = None
-        self.signature = Signature(self.function)
+        self.signature = get_signature(self.function)
         self.returns = returns
+        ## Encoded on first use, calls reused across multicalls (SnapTemplate) encode once
+        self.calldata = None
 
     @property
     def data(self):
-        return self.signature.encode_data(self.args)
+        if self.calldata is None:
+            self.calldata = self.signature.encode_data(self.args)
+        return self.calldata
 
     def decode_output(self, output):
         decoded = self.signature.decode_data(output)
@@ -29,8 +38,8 @@ class Call:
         else:
             return decoded if len(decoded) > 1 else decoded[0]
 
-    def __call__(self, args=None):
+    def __call__(self, args=None, block_identifier=None):
         args = args or self.args
         calldata = self.signature.encode_data(args)
-        output = web3.eth.call({"to": self.target, "data": calldata})
+        output = web3.eth.call({"to": self.target, "data": calldata}, block_identifier)
         return self.decode_output(output)
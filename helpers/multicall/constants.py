@@ -29,3 +29,7 @@ MULTICALL_ADDRESSES = {
     Network.Arbitrum: "0x7A7443F8c577d537f1d8cD4a629d40a3148Dd7ee",
     Network.Hardhat: "0x7A7443F8c577d537f1d8cD4a629d40a3148Dd7ee",
 }
+
+## Multicall3 has the same address on every chain and supports tryAggregate
+## See: https://github.com/mds1/multicall
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
@@ -20,6 +20,9 @@ erc20 = DotMap(
 )
 sett = DotMap(
     getPricePerFullShare="getPricePerFullShare()(uint256)",
+    token="token()(address)",
+    treasury="treasury()(address)",
+    badgerTree="badgerTree()(address)",
     available="available()(uint256)",
     balance="balance()(uint256)",
     controller="controller()(address)",
@@ -34,6 +37,11 @@ sett = DotMap(
     performanceFeeStrategist="performanceFeeStrategist()(uint256)",
 )
 strategy = DotMap(
+    want="want()(address)",
+    governance="governance()(address)",
+    strategist="strategist()(address)",
+    LOCKER="LOCKER()(address)",
+    OXSOLID="OXSOLID()(address)",
     balanceOfPool="balanceOfPool()(uint256)",
     balanceOfWant="balanceOfWant()(uint256)",
     balanceOf="balanceOf()(uint256)",
@@ -58,6 +66,11 @@ diggFaucet = DotMap(
     # claimable rewards
     earned="earned()(uint256)",
 )
+vlOxd = DotMap(
+    lockedBalanceOf="lockedBalanceOf(address)(uint256)",
+    ## total, unlockable, locked, (amount, boosted, unlockTime)[] of the locks not yet expired
+    lockedBalances="lockedBalances(address)(uint256,uint256,uint256,(uint112,uint112,uint32)[])",
+)
 pancakeChef = DotMap(
     pendingCake="pendingCake(uint256,uint256)(uint256)",
     userInfo="userInfo(uint256,address)(uint256,uint256)",
@@ -71,4 +84,5 @@ func = DotMap(
     diggFaucet=diggFaucet,
     digg=digg,
     pancakeChef=pancakeChef,
+    vlOxd=vlOxd,
 )
@@ -1,18 +1,92 @@
 # Credit: https://github.com/banteg/multicall.py/blob/master/multicall/multicall.py
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from brownie import web3
 
 from helpers.multicall import Call
-from helpers.multicall.constants import MULTICALL_ADDRESSES
+from helpers.multicall.constants import MULTICALL_ADDRESSES, MULTICALL3_ADDRESS
 from rich.console import Console
 
 console = Console()
 
+## ABI overhead of one (address,bytes) entry: offset, address, bytes offset, bytes length
+CALL_OVERHEAD = 4 * 32
+DEFAULT_MAX_WORKERS = 4
+
+AGGREGATE = "aggregate((address,bytes)[])(uint256,bytes[])"
+TRY_AGGREGATE = (
+    "tryBlockAndAggregate(bool,(address,bytes)[])(uint256,bytes32,(bool,bytes)[])"
+)
+
+## Node errors that mean the batch was too big rather than a call reverting
+LIMIT_ERRORS = [
+    "out of gas",
+    "gas required exceeds",
+    "exceeds block gas limit",
+    "payload too large",
+    "request entity too large",
+    "413 client error",
+    "response size exceeded",
+]
+PAYLOAD_TOO_LARGE = 413
+
+
+def is_limit_error(error):
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == PAYLOAD_TOO_LARGE:
+        return True
+    message = str(error).lower()
+    return any(limit in message for limit in LIMIT_ERRORS)
+
+
+def calldata_size(data):
+    ## Calldata is padded to 32 byte words in the aggregate encoding
+    return CALL_OVERHEAD + -(-len(data) // 32) * 32
+
 
 class Multicall:
-    def __init__(self, calls: List[Call]):
+    def __init__(
+        self,
+        calls: List[Call],
+        max_calls_per_batch=None,
+        max_calldata_size=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+        require_success=True,
+        default=None,
+        block_identifier=None,
+        cache=None,
+    ):
+        """
+        max_calls_per_batch and max_calldata_size split the calls over several aggregate eth_calls
+        Batches run concurrently over max_workers threads, results keep the order of calls
+
+        With require_success=False calls go through Multicall3.tryBlockAndAggregate
+        A reverting call then sets its keys to default instead of reverting the whole batch
+
+        block_identifier pins every batch to one block, when it's None and the calls
+        need several batches they are pinned to the current block so they stay consistent
+
+        cache is an optional CallCache, it's only used when block_identifier is a block number
+        """
         self.calls = calls
+        self.max_calls_per_batch = max_calls_per_batch
+        self.max_calldata_size = max_calldata_size
+        self.max_workers = max_workers
+        self.require_success = require_success
+        self.default = default
+        self.block_identifier = block_identifier
+        self.cache = cache
+        ## Filled in by __call__, success is aligned with calls
+        self.block = None
+        self.success = []
+        self.failed = []
+        ## Hash of the block tryBlockAndAggregate ran at, None when nothing was fetched with it
+        self.blockHash = None
+        ## Calls that repeated the (target, calldata) of an earlier call, see requests
+        self.saved = 0
+        ## Index of each call's request
+        self.positions = []
 
     def printCalls(self):
         for call in self.calls:
@@ -20,14 +94,190 @@ class Multicall:
                 {"target": call.target, "function": call.function, "args": call.args}
             )
 
-    def __call__(self):
-        aggregate = Call(
-            MULTICALL_ADDRESSES[web3.eth.chainId],
-            "aggregate((address,bytes)[])(uint256,bytes[])",
+    def batches(self, requests):
+        """
+        Splits [target, calldata] pairs into batches that respect the configured limits
+        """
+        batches = []
+        batch = []
+        size = 0
+        for request in requests:
+            request_size = calldata_size(request[1])
+            too_many = (
+                self.max_calls_per_batch and len(batch) >= self.max_calls_per_batch
+            )
+            too_big = (
+                self.max_calldata_size and size + request_size > self.max_calldata_size
+            )
+            if batch and (too_many or too_big):
+                batches.append(batch)
+                batch = []
+                size = 0
+            batch.append(request)
+            size += request_size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def aggregate_call(self, chainId):
+        if self.require_success:
+            return Call(MULTICALL_ADDRESSES[chainId], AGGREGATE)
+        return Call(MULTICALL3_ADDRESS, TRY_AGGREGATE)
+
+    def aggregate_args(self, batch):
+        if self.require_success:
+            return [batch]
+        return [False, batch]
+
+    def aggregate_results(self, decoded):
+        """
+        Returns the block number and [success, output] for each [target, calldata] in the batch
+        """
+        if self.require_success:
+            block, outputs = decoded
+            return block, [[True, output] for output in outputs]
+        block, blockHash, results = decoded
+        self.blockHash = blockHash
+        return block, [list(result) for result in results]
+
+    def execute(self, aggregate, batch, block_identifier):
+        return self.aggregate_results(
+            aggregate(self.aggregate_args(batch), block_identifier)
         )
-        args = [[[call.target, call.data] for call in self.calls]]
-        block, outputs = aggregate(args)
+
+    def aggregate(self, aggregate, batch, block_identifier):
+        """
+        Runs one batch, bisecting it whenever the node rejects it for its size
+        The halves are pinned to one block so they stay consistent with each other
+        """
+        try:
+            return self.execute(aggregate, batch, block_identifier)
+        except Exception as error:
+            if len(batch) < 2 or not is_limit_error(error):
+                raise
+            if block_identifier is None:
+                block_identifier = web3.eth.block_number
+            middle = len(batch) // 2
+            block, first = self.aggregate(aggregate, batch[:middle], block_identifier)
+            block, second = self.aggregate(aggregate, batch[middle:], block_identifier)
+            return block, first + second
+
+    def decode(self, call, success, output):
+        """
+        Decodes one output, falling back to the default when the call failed
+        Undecodable output (e.g. an EOA target returning nothing) counts as a failure
+        """
+        if success:
+            try:
+                return True, call.decode_output(output)
+            except Exception:
+                if self.require_success:
+                    raise
+        return False, {name: self.default for name, handler in call.returns or []}
+
+    def requests(self):
+        """
+        Unique [target, calldata] pairs of the calls, each is executed once
+        e.g. balanceOf(governance) and balanceOf(strategist) when both are the same account
+        """
+        index = {}
+        requests = []
+        self.positions = []
+        for call in self.calls:
+            request = (call.target, call.data)
+            if request not in index:
+                index[request] = len(requests)
+                requests.append(list(request))
+            self.positions.append(index[request])
+        self.saved = len(self.calls) - len(requests)
+        return requests
+
+    def lookup(self, chainId, requests):
+        """
+        Returns the cached [success, output] for each request, None when it has to be fetched
+        """
+        if self.cache is None or not self.cache.cacheable(
+            chainId, self.block_identifier
+        ):
+            return [None] * len(requests)
+        return [
+            None if output is None else [True, output]
+            for output in self.cache.get_many(chainId, self.block_identifier, requests)
+        ]
+
+    def fill(self, chainId, requests, outputs, pending, results):
+        """
+        Puts the fetched [success, output] pairs in place of the pending requests
+        and caches the successful ones, returns the block the batches ran at
+        """
+        fetched = [pair for block, pairs in results for pair in pairs]
+        for index, pair in zip(pending, fetched):
+            outputs[index] = pair
+
+        if self.cache is not None and self.cache.cacheable(
+            chainId, self.block_identifier
+        ):
+            self.cache.set_many(
+                chainId,
+                self.block_identifier,
+                [
+                    requests[index] + [output]
+                    for index, (success, output) in zip(pending, fetched)
+                    if success
+                ],
+            )
+
+        if results:
+            return max(block for block, pairs in results)
+        return self.block_identifier
+
+    def merge(self, block, outputs):
+        """
+        Decodes [success, output] pairs, aligned with requests(), into a single result dict
+        Duplicate calls each decode their request's output
+        """
+        self.block = block
         result = {}
-        for call, output in zip(self.calls, outputs):
-            result.update(call.decode_output(output))
+        self.success = []
+        self.failed = []
+        for call, position in zip(self.calls, self.positions):
+            success, output = outputs[position]
+            success, values = self.decode(call, success, output)
+            self.success.append(success)
+            if not success:
+                self.failed.extend(values.keys())
+            result.update(values)
         return result
+
+    def __call__(self):
+        chainId = web3.eth.chainId
+        aggregate = self.aggregate_call(chainId)
+        requests = self.requests()
+        outputs = self.lookup(chainId, requests)
+        pending = [index for index, output in enumerate(outputs) if output is None]
+        batches = self.batches([requests[index] for index in pending])
+
+        block_identifier = self.block_identifier
+        if block_identifier is None and len(batches) > 1:
+            block_identifier = web3.eth.block_number
+
+        if len(batches) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(batches))
+            ) as executor:
+                ## map yields in submission order, so outputs line up with calls
+                results = list(
+                    executor.map(
+                        lambda batch: self.aggregate(
+                            aggregate, batch, block_identifier
+                        ),
+                        batches,
+                    )
+                )
+        else:
+            results = [
+                self.aggregate(aggregate, batch, block_identifier) for batch in batches
+            ]
+
+        block = self.fill(chainId, requests, outputs, pending, results)
+        return self.merge(block, outputs)
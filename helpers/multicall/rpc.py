@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+
+import aiohttp
+from brownie import web3
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+DEFAULT_TIMEOUT = 60
+
+
+class RPCError(Exception):
+    def __init__(self, error):
+        self.code = error.get("code")
+        self.data = error.get("data")
+        super().__init__(error.get("message", str(error)))
+
+
+class AsyncRPC:
+    """
+    asyncio JSON-RPC client over HTTP
+    One aiohttp session keeps connections alive and pooled,
+    a semaphore bounds the number of requests in flight
+    Use as `async with AsyncRPC(url) as rpc:`
+    """
+
+    def __init__(
+        self,
+        endpoint_uri,
+        concurrency=DEFAULT_CONCURRENCY,
+        keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.endpoint_uri = endpoint_uri
+        self.concurrency = concurrency
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.session = None
+        self.semaphore = None
+
+    @classmethod
+    def from_brownie(cls, **kwargs):
+        """
+        Client for the node brownie is connected to
+        """
+        return cls(web3.provider.endpoint_uri, **kwargs)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        ## Created inside the running loop, aiohttp binds both to it
+        if self.session is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.concurrency, keepalive_timeout=self.keepalive_timeout
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def post(self, payload):
+        await self.open()
+        async with self.semaphore:
+            async with self.session.post(self.endpoint_uri, json=payload) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def request(self, method, params):
+        response = await self.post(
+            {"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params}
+        )
+        if "error" in response:
+            raise RPCError(response["error"])
+        return response["result"]
+
+    async def chain_id(self):
+        return int(await self.request("eth_chainId", []), 16)
+
+    async def block_number(self):
+        return int(await self.request("eth_blockNumber", []), 16)
+
+    async def eth_call(self, tx, block="latest"):
+        return await self.request("eth_call", [tx, block])
+
+    async def get_storage_at(self, address, slot, block="latest"):
+        if isinstance(block, int):
+            block = hex(block)
+        return await self.request("eth_getStorageAt", [address, hex(slot), block])
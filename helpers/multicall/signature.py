@@ -1,8 +1,18 @@
 # Credit: https://github.com/banteg/multicall.py/blob/master/multicall/signature.py
+from functools import lru_cache
 
-from eth_abi import encode_single, decode_single
+from eth_abi.decoding import AddressDecoder, ContextFramesBytesIO
+from eth_abi.registry import registry
 from eth_utils import function_signature_to_4byte_selector
 
+## Upper bound on interned signatures, a snapshot only uses a few dozen
+SIGNATURE_CACHE_SIZE = 1024
+
+WORD_SIZE = 32
+ADDRESS_PADDING = bytes(12)
+MAX_UINT256 = 2**256 - 1
+EMPTY = "()"
+
 
 def parse_signature(signature):
     """
@@ -25,6 +35,65 @@ def parse_signature(signature):
     return parts
 
 
+## Fast paths for single static word arguments and results
+## They return None when the value isn't the plain case, the eth_abi codec handles the rest
+def encode_address(args):
+    if len(args) != 1:
+        return None
+    value = args[0]
+    if not isinstance(value, str) or len(value) != 42 or value[:2] != "0x":
+        return None
+    ## Mixed case must pass the checksum, which the codec verifies
+    body = value[2:]
+    if body != body.lower() and body != body.upper():
+        return None
+    try:
+        return ADDRESS_PADDING + bytes.fromhex(body)
+    except ValueError:
+        return None
+
+
+def encode_uint256(args):
+    if len(args) != 1:
+        return None
+    value = args[0]
+    if type(value) is int and 0 <= value <= MAX_UINT256:
+        return value.to_bytes(WORD_SIZE, "big")
+    return None
+
+
+def decode_uint256(output):
+    if len(output) < WORD_SIZE:
+        return None
+    return (int.from_bytes(output[:WORD_SIZE], "big"),)
+
+
+def decode_bool(output):
+    if len(output) < WORD_SIZE:
+        return None
+    value = int.from_bytes(output[:WORD_SIZE], "big")
+    if value > 1:
+        return None
+    return (value == 1,)
+
+
+def decode_address(output):
+    if len(output) < WORD_SIZE or output[:12] != ADDRESS_PADDING:
+        return None
+    return (AddressDecoder.decoder_fn(output[12:WORD_SIZE]),)
+
+
+FAST_ENCODERS = {
+    "(address)": encode_address,
+    "(uint256)": encode_uint256,
+}
+FAST_DECODERS = {
+    "(uint256)": decode_uint256,
+    "(bool)": decode_bool,
+    "(address)": decode_address,
+}
+
+
 class Signature:
     def __init__(self, signature):
         self.signature = signature
@@ -33,13 +102,41 @@ class Signature:
         self.output_types = self.parts[2]
         self.function = "".join(self.parts[:2])
         self.fourbyte = function_signature_to_4byte_selector(self.function)
+        ## Built once, eth_abi.encode / decode would look them up on every call
+        ## eth_abi has no codec for "()", no arguments is the bare selector and no outputs is ()
+        self.encoder = None
+        if self.input_types != EMPTY:
+            self.encoder = registry.get_encoder(self.input_types)
+        self.decoder = None
+        if self.output_types != EMPTY:
+            self.decoder = registry.get_decoder(self.output_types)
+        self.fast_encoder = FAST_ENCODERS.get(self.input_types)
+        self.fast_decoder = FAST_DECODERS.get(self.output_types)
 
     def encode_data(self, args=None):
-        return (
-            self.fourbyte + encode_single(self.input_types, args)
-            if args
-            else self.fourbyte
-        )
+        if not args or self.encoder is None:
+            return self.fourbyte
+        if self.fast_encoder:
+            encoded = self.fast_encoder(args)
+            if encoded is not None:
+                return self.fourbyte + encoded
+        return self.fourbyte + self.encoder(args)
 
     def decode_data(self, output):
-        return decode_single(self.output_types, output)
+        if self.decoder is None:
+            return ()
+        if self.fast_decoder:
+            decoded = self.fast_decoder(output)
+            if decoded is not None:
+                return decoded
+        return self.decoder(ContextFramesBytesIO(output))
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def get_signature(signature):
+    """
+    Returns the shared Signature for 'func(address)(uint256)'
+    Parsing and the keccak for the selector only happen the first time a signature is seen
+    NOTE: Signatures are shared between Calls, treat them as read-only
+    """
+    return Signature(signature)
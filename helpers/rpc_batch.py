@@ -0,0 +1,102 @@
+import requests
+from brownie import web3
+
+from helpers.multicall.rpc import RPCError
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_TIMEOUT = 60
+
+
+def block_tag(block):
+    return hex(block) if isinstance(block, int) else block
+
+
+class RPCBatch:
+    """
+    Packs reads that can't go through Multicall (storage slots, native balances, blocks)
+    into JSON-RPC batch arrays, batch_size requests per HTTP round trip
+
+    execute() returns one entry per queued request, in order
+    Failed requests come back as RPCError instead of raising, so one bad item doesn't hide the rest
+    """
+
+    def __init__(
+        self, endpoint_uri=None, batch_size=DEFAULT_BATCH_SIZE, timeout=DEFAULT_TIMEOUT
+    ):
+        self.endpoint_uri = endpoint_uri or web3.provider.endpoint_uri
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.requests = []
+        self.session = requests.Session()
+
+    def add(self, method, params):
+        """
+        Queues a request, returns its index in the execute() results
+        """
+        self.requests.append(
+            {
+                "jsonrpc": "2.0",
+                "id": len(self.requests),
+                "method": method,
+                "params": params,
+            }
+        )
+        return len(self.requests) - 1
+
+    def get_storage_at(self, address, slot, block="latest"):
+        return self.add("eth_getStorageAt", [str(address), hex(slot), block_tag(block)])
+
+    def get_balance(self, address, block="latest"):
+        return self.add("eth_getBalance", [str(address), block_tag(block)])
+
+    def get_block(self, block="latest", full_transactions=False):
+        return self.add("eth_getBlockByNumber", [block_tag(block), full_transactions])
+
+    def post(self, batch):
+        response = self.session.post(
+            self.endpoint_uri, json=batch, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def execute(self):
+        results = [None] * len(self.requests)
+        for start in range(0, len(self.requests), self.batch_size):
+            batch = self.requests[start : start + self.batch_size]
+            responses = self.post(batch)
+
+            ## A node without batch support answers with a single error object
+            if isinstance(responses, dict):
+                for request in batch:
+                    results[request["id"]] = RPCError(responses.get("error", {}))
+                continue
+
+            ## Batch responses may come back in any order, match them by id
+            ids = {request["id"] for request in batch}
+            received = set()
+            ## Error of a response with a null / unknown id, the request it answers can't be told
+            unmatched = None
+            for response in responses:
+                requestId = response.get("id")
+                if requestId not in ids:
+                    if "error" in response:
+                        unmatched = response["error"]
+                    elif unmatched is None:
+                        unmatched = {
+                            "message": "response with unknown id {}".format(requestId)
+                        }
+                    continue
+                received.add(requestId)
+                if "error" in response:
+                    results[requestId] = RPCError(response["error"])
+                else:
+                    results[requestId] = response["result"]
+
+            for request in batch:
+                if request["id"] not in received:
+                    results[request["id"]] = RPCError(
+                        unmatched or {"message": "no response"}
+                    )
+
+        self.requests = []
+        return results
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+"""
+  Record / replay proxy for the upstream RPC a fork reads its state from
+  Responses are stored in SQLite, keyed by the sha256 of the method and params
+  Ganache asks for state at the pinned fork block, so the same requests come back run after run
+  eth_blockNumber is answered with the fork block, answers that depend on the head are never recorded
+  With RPC_CACHE_MODE=replay the tests run offline from the recording
+"""
+
+## off: talk to the upstream directly, record: serve from the cache and record misses, replay: cache only
+MODES = ["off", "record", "replay"]
+RPC_CACHE_MODE = os.getenv("RPC_CACHE_MODE", "off")
+RPC_CACHE_PATH = os.getenv("RPC_CACHE_PATH", os.path.join("build", "rpc_cache.sqlite"))
+
+## Answers that depend on when they're asked, never recorded
+VOLATILE_METHODS = [
+    "eth_blockNumber",
+    "eth_gasPrice",
+    "eth_maxPriorityFeePerGas",
+    "eth_feeHistory",
+    "eth_syncing",
+]
+BLOCK_TAGS = ["latest", "pending", "safe", "finalized"]
+
+UPSTREAM_TIMEOUT = 60
+## Error returned for requests that weren't recorded, in replay mode
+NOT_RECORDED = -32001
+
+
+def request_key(method, params):
+    body = json.dumps([method, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class RPCRecorder:
+    def __init__(self, upstream, path=RPC_CACHE_PATH, mode="record", forkBlock=None):
+        """
+        forkBlock: block the fork is pinned to, eth_blockNumber is answered with it
+        """
+        if mode not in MODES[1:]:
+            raise ValueError("mode must be one of {}".format(MODES[1:]))
+        self.upstream = upstream
+        self.forkBlock = forkBlock
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.hits = 0
+        self.misses = 0
+        self.server = None
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        ## xdist workers share the file, wait on each other's writes
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                result TEXT NOT NULL
+            )
+            """
+        )
+        self.db.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result FROM responses WHERE key=?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, method, result):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, method, result) VALUES (?, ?, ?)",
+                (key, method, result),
+            )
+            self.db.commit()
+
+    def handle(self, payload):
+        """
+        Response to one JSON-RPC request
+        """
+        method = payload.get("method")
+        params = payload.get("params", [])
+        if method == "eth_blockNumber" and self.forkBlock is not None:
+            return {
+                "jsonrpc": "2.0",
+                "id": payload.get("id"),
+                "result": hex(self.forkBlock),
+            }
+        volatile = method in VOLATILE_METHODS or any(
+            param in BLOCK_TAGS for param in params if isinstance(param, str)
+        )
+        key = request_key(method, params)
+
+        cached = None if volatile else self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return {
+                "jsonrpc": "2.0",
+                "id": payload.get("id"),
+                "result": json.loads(cached),
+            }
+
+        self.misses += 1
+        if self.mode == "replay":
+            return {
+                "jsonrpc": "2.0",
+                "id": payload.get("id"),
+                "error": {
+                    "code": NOT_RECORDED,
+                    "message": "Not recorded: {} {}".format(method, json.dumps(params)),
+                },
+            }
+
+        response = self.session.post(
+            self.upstream, json=payload, timeout=UPSTREAM_TIMEOUT
+        ).json()
+        ## Errors can be transient (rate limits), only results are recorded
+        if "result" in response and not volatile:
+            self.set(key, method, json.dumps(response["result"]))
+        return response
+
+    def handle_body(self, body):
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return [self.handle(item) for item in payload]
+        return self.handle(payload)
+
+    def serve(self, host="127.0.0.1", port=0):
+        """
+        Starts the proxy in a daemon thread, returns its url
+        """
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                response = json.dumps(recorder.handle_body(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return "http://{}:{}".format(host, self.server.server_address[1])
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.db.close()
@@ -0,0 +1,133 @@
+import numpy as np
+
+from helpers import shares_math
+
+"""
+  Batch versions of helpers.shares_math
+  Every argument may be a scalar or an array, they broadcast against each other
+  Values are held as object arrays of Python ints so // floors exactly like Solidity's uint256 math
+"""
+
+
+def as_uint_array(values):
+    """
+    Object array of Python ints for `values`, rejects floats so no precision is lost silently
+    """
+    array = np.asarray(values)
+    if array.dtype == object:
+        return array
+    if array.dtype.kind not in "iub":
+        raise TypeError("Expected integer values, got {}".format(array.dtype))
+    ## astype(object) turns fixed width ints into Python ints, so math can't overflow
+    return array.astype(object)
+
+
+def _batch(fn, *args):
+    ## Copy the broadcast views, shares_math uses += which would write through them
+    arrays = np.broadcast_arrays(*[as_uint_array(arg) for arg in args])
+    return fn(*[np.array(array) for array in arrays])
+
+
+def from_want_to_shares(
+    want_deposited, total_supply_before_deposit, balance_before_deposit
+):
+    return _batch(
+        shares_math.from_want_to_shares,
+        want_deposited,
+        total_supply_before_deposit,
+        balance_before_deposit,
+    )
+
+
+def from_shares_to_want(shares_to_burn, ppfs_before_withdraw, vault_decimals):
+    return _batch(
+        shares_math.from_shares_to_want,
+        shares_to_burn,
+        ppfs_before_withdraw,
+        vault_decimals,
+    )
+
+
+def get_withdrawal_fees_in_want(
+    shares_to_burn, ppfs_before_withdraw, vault_decimals, withdrawal_fee_bps
+):
+    return _batch(
+        shares_math.get_withdrawal_fees_in_want,
+        shares_to_burn,
+        ppfs_before_withdraw,
+        vault_decimals,
+        withdrawal_fee_bps,
+    )
+
+
+def get_withdrawal_fees_in_shares(
+    shares_to_burn,
+    ppfs_before_withdraw,
+    vault_decimals,
+    withdrawal_fee_bps,
+    total_supply_before_withdraw,
+    vault_balance_before_withdraw,
+):
+    return _batch(
+        shares_math.get_withdrawal_fees_in_shares,
+        shares_to_burn,
+        ppfs_before_withdraw,
+        vault_decimals,
+        withdrawal_fee_bps,
+        total_supply_before_withdraw,
+        vault_balance_before_withdraw,
+    )
+
+
+def get_performance_fees_want(total_harvest_gain, performance_fee):
+    return _batch(
+        shares_math.get_performance_fees_want, total_harvest_gain, performance_fee
+    )
+
+
+def get_management_fees_want(total_assets, time_passed, management_fee):
+    return _batch(
+        shares_math.get_management_fees_want,
+        total_assets,
+        time_passed,
+        management_fee,
+    )
+
+
+def get_performance_fees_shares(
+    total_harvest_gain,
+    performance_fee,
+    total_supply_before_deposit,
+    balance_before_deposit,
+):
+    return _batch(
+        shares_math.get_performance_fees_shares,
+        total_harvest_gain,
+        performance_fee,
+        total_supply_before_deposit,
+        balance_before_deposit,
+    )
+
+
+def get_report_fees(
+    total_harvest_gain,
+    performance_fee_treasury,
+    performance_fee_strategist,
+    management_fee,
+    time_since_last_harvest,
+    total_supply_before_deposit,
+    balance_before_deposit,
+):
+    """
+    Same DotMap as shares_math.get_report_fees, each entry an array over the scenarios
+    """
+    return _batch(
+        shares_math.get_report_fees,
+        total_harvest_gain,
+        performance_fee_treasury,
+        performance_fee_strategist,
+        management_fee,
+        time_since_last_harvest,
+        total_supply_before_deposit,
+        balance_before_deposit,
+    )
@@ -0,0 +1,90 @@
+from itertools import zip_longest
+
+from tabulate import tabulate
+
+from helpers.snapshot.snap import MISSING
+
+
+class SnapDiff:
+    """
+    Changes between two Snaps, found in one pass over their aligned value lists
+    indices: schema indices of the keys that changed
+    deltas: after - before for integer values, None otherwise
+    relatives: delta / before, None when before is 0 or not an integer
+    Nothing is formatted until render() / str() is called
+    NOTE: Values are uint256, too wide for fixed-width arrays, so they stay Python ints
+    """
+
+    __slots__ = (
+        "before",
+        "after",
+        "schema",
+        "afterValues",
+        "indices",
+        "deltas",
+        "relatives",
+    )
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        self.schema = before.schema
+
+        beforeValues = before.values
+        if after.schema is before.schema:
+            afterValues = after.values
+        else:
+            afterValues = [
+                after.values[after.schema.index[key]] if after.has(key) else MISSING
+                for key in before.schema.keys
+            ]
+
+        self.afterValues = afterValues
+        self.indices = []
+        self.deltas = []
+        self.relatives = []
+        for index, (a, b) in enumerate(
+            zip_longest(beforeValues, afterValues, fillvalue=MISSING)
+        ):
+            if a is MISSING or a == b:
+                continue
+            self.indices.append(index)
+            if type(a) is int and type(b) is int:
+                delta = b - a
+                self.deltas.append(delta)
+                self.relatives.append(delta / a if a else None)
+            else:
+                self.deltas.append(None)
+                self.relatives.append(None)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def keys(self):
+        return [self.schema.keys[index] for index in self.indices]
+
+    def rows(self, format=None):
+        format = format or (lambda key, value: value)
+        rows = []
+        for index, delta in zip(self.indices, self.deltas):
+            key = self.schema.keys[index]
+            b = self.afterValues[index] if index < len(self.afterValues) else MISSING
+            rows.append(
+                [
+                    key,
+                    format(key, self.before.values[index]),
+                    format(key, b),
+                    format(key, "-" if delta is None else delta),
+                ]
+            )
+        return rows
+
+    def render(self, format=None):
+        return tabulate(
+            self.rows(format),
+            headers=["metric", "before", "after", "diff"],
+            tablefmt="grid",
+        )
+
+    def __str__(self):
+        return self.render()
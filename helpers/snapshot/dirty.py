@@ -0,0 +1,115 @@
+from eth_utils import function_signature_to_4byte_selector, keccak
+
+TRANSFER_TOPIC = keccak(text="Transfer(address,address,uint256)")
+HARVESTED_TOPIC = keccak(text="Harvested(address,uint256,uint256,uint256)")
+
+
+def setter(event, function):
+    return keccak(text=event), function_signature_to_4byte_selector(function)
+
+
+## Sett parameters that only change through a governance setter
+## snap key -> (setter event topic, setter selector), None when the value never changes
+PARAMS = {
+    "sett.decimals": None,
+    "sett.withdrawalFee": setter(
+        "SetWithdrawalFee(uint256)", "setWithdrawalFee(uint256)"
+    ),
+    "sett.managementFee": setter(
+        "SetManagementFee(uint256)", "setManagementFee(uint256)"
+    ),
+    "sett.performanceFeeGovernance": setter(
+        "SetPerformanceFeeGovernance(uint256)", "setPerformanceFeeGovernance(uint256)"
+    ),
+    "sett.performanceFeeStrategist": setter(
+        "SetPerformanceFeeStrategist(uint256)", "setPerformanceFeeStrategist(uint256)"
+    ),
+}
+
+## Snap keys read with balanceOf(address) / sharesOf(address) on a token
+BALANCE_PREFIXES = ("balances.", "shares.")
+
+
+def topic_to_address(topic):
+    return "0x" + bytes(topic)[-20:].hex()
+
+
+def touched_by(tx):
+    """
+    Returns (addresses, transfers) for a transaction receipt
+    addresses: lowercase addresses that sent, received or emitted a log
+    transfers: (token, account) pairs whose balance moved according to Transfer logs
+    """
+    addresses = {str(tx.sender).lower()}
+    if tx.receiver:
+        addresses.add(str(tx.receiver).lower())
+    transfers = set()
+
+    for log in tx.logs:
+        token = str(log["address"]).lower()
+        addresses.add(token)
+        topics = log["topics"]
+        if len(topics) == 3 and bytes(topics[0]) == TRANSFER_TOPIC:
+            sender = topic_to_address(topics[1])
+            recipient = topic_to_address(topics[2])
+            addresses.update([sender, recipient])
+            transfers.update([(token, sender), (token, recipient)])
+
+    return addresses, transfers
+
+
+def is_harvest(tx):
+    return any(
+        log["topics"] and bytes(log["topics"][0]) == HARVESTED_TOPIC for log in tx.logs
+    )
+
+
+def changed_params(tx, core):
+    """
+    PARAMS keys whose setter event one of the `core` contracts emitted in `tx`,
+    or whose setter `tx` called on one of them
+    """
+    topics = {
+        bytes(log["topics"][0])
+        for log in tx.logs
+        if log["topics"] and str(log["address"]).lower() in core
+    }
+    selector = None
+    if tx.receiver and str(tx.receiver).lower() in core:
+        selector = bytes.fromhex(str(tx.input)[2:10])
+    return {
+        key
+        for key, params in PARAMS.items()
+        if params is not None and (params[0] in topics or params[1] == selector)
+    }
+
+
+def dirty_calls(calls, previous, tx, core):
+    """
+    Filters snap calls down to the ones `tx` could have changed since `previous`
+    - balances / shares only when a Transfer log moved that token for that account
+    - PARAMS only when the tx emitted their setter event or called their setter, see changed_params
+    - any other field when the tx touched its target or one of the `core` contracts
+      (sett and strategy fields depend on each other), or harvested
+    - keys missing from, or failed in, `previous` are always re-read
+    NOTE: Assumes balances only move with a Transfer log, rebasing tokens need a full snap
+    """
+    addresses, transfers = touched_by(tx)
+    core = {address.lower() for address in core}
+    fieldsDirty = is_harvest(tx) or bool(addresses & core)
+    params = changed_params(tx, core)
+
+    dirty = []
+    for call in calls:
+        keys = [name for name, handler in call.returns]
+        if any(not previous.has(key) or key in previous.failedKeys for key in keys):
+            dirty.append(call)
+        elif keys[0] in PARAMS:
+            if keys[0] in params:
+                dirty.append(call)
+        elif keys[0].startswith(BALANCE_PREFIXES) and call.args:
+            if (call.target.lower(), str(call.args[0]).lower()) in transfers:
+                dirty.append(call)
+        elif fieldsDirty or call.target.lower() in addresses:
+            dirty.append(call)
+    return dirty
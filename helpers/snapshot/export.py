@@ -0,0 +1,109 @@
+import json
+import os
+
+import numpy as np
+
+## uint256 values are stored exactly as 4 little-endian uint64 limbs
+LIMBS = 4
+LIMB_BITS = 64
+LIMB_MASK = 2**LIMB_BITS - 1
+LIMB_WEIGHTS = np.array([2.0 ** (LIMB_BITS * i) for i in range(LIMBS)])
+
+INDEX_FILE = "index.json"
+BLOCKS_FILE = "blocks.npy"
+VALID_FILE = "valid.npy"
+
+
+def to_limbs(value):
+    return [(value >> (LIMB_BITS * i)) & LIMB_MASK for i in range(LIMBS)]
+
+
+def export_snaps(snaps, path, keys=None):
+    """
+    Writes a block -> Snap mapping (e.g. SnapshotManager.snaps) to the directory `path`
+    One row per block, one column per key:
+    - blocks.npy: int64 block of each row
+    - c<i>.npy: (rows, 4) uint64 limbs of key i
+    - valid.npy: (rows, columns) bool, False where the snap has no integer value
+    - index.json: keys in column order
+    keys defaults to every key whose values are integers (or bools)
+    """
+    blocks = sorted(snaps)
+    if keys is None:
+        keys = []
+        seen = set()
+        for block in blocks:
+            for key, value in snaps[block].items():
+                if key not in seen and type(value) in (int, bool):
+                    seen.add(key)
+                    keys.append(key)
+
+    columns = {key: np.zeros((len(blocks), LIMBS), dtype=np.uint64) for key in keys}
+    valid = np.zeros((len(blocks), len(keys)), dtype=bool)
+    for row, block in enumerate(blocks):
+        snap = snaps[block]
+        for column, key in enumerate(keys):
+            if not snap.has(key):
+                continue
+            value = snap.get(key)
+            if type(value) not in (int, bool) or not 0 <= value <= 2**256 - 1:
+                continue
+            columns[key][row] = to_limbs(int(value))
+            valid[row, column] = True
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, BLOCKS_FILE), np.array(blocks, dtype=np.int64))
+    np.save(os.path.join(path, VALID_FILE), valid)
+    for column, key in enumerate(keys):
+        np.save(os.path.join(path, "c{}.npy".format(column)), columns[key])
+    with open(os.path.join(path, INDEX_FILE), "w") as f:
+        json.dump({"keys": keys}, f)
+
+
+class SnapshotColumns:
+    """
+    Memory-mapped view of a directory written by export_snaps
+    Columns are only read from disk when they are accessed
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.keys = json.load(f)["keys"]
+        self.index = {key: column for column, key in enumerate(self.keys)}
+        self.blocks = np.load(os.path.join(path, BLOCKS_FILE), mmap_mode="r")
+        self.validMatrix = np.load(os.path.join(path, VALID_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def limbs(self, key):
+        """
+        (rows, 4) uint64 limbs of `key`, memory-mapped
+        """
+        return np.load(
+            os.path.join(self.path, "c{}.npy".format(self.index[key])), mmap_mode="r"
+        )
+
+    def valid(self, key):
+        return self.validMatrix[:, self.index[key]]
+
+    def as_float(self, key):
+        """
+        float64 values of `key`, NaN where the snap had no value
+        NOTE: Lossy above 2**53, use as_int for exact math
+        """
+        values = self.limbs(key).astype(np.float64) @ LIMB_WEIGHTS
+        values[~self.valid(key)] = np.nan
+        return values
+
+    def as_int(self, key):
+        """
+        Exact Python int values of `key`, None where the snap had no value
+        """
+        return [
+            sum(int(limb) << (LIMB_BITS * i) for i, limb in enumerate(row))
+            if valid
+            else None
+            for row, valid in zip(self.limbs(key), self.valid(key))
+        ]
@@ -0,0 +1,157 @@
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from helpers.snapshot.snap import MISSING, Snap
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+class SnapshotHistory(MutableMapping):
+    """
+    block -> Snap, keeping at most maxInMemory snaps alive
+    Older snaps that aren't pinned are spilled to disk, chunkSize at a time, as columnar
+    chunks (one list of values per schema key) and loaded back lazily on access
+    maxInMemory=None keeps everything in memory, like a plain dict
+    """
+
+    def __init__(self, maxInMemory=None, spillDir=None, chunkSize=DEFAULT_CHUNK_SIZE):
+        self.maxInMemory = maxInMemory
+        self.spillDir = spillDir
+        self.chunkSize = chunkSize
+        self.memory = OrderedDict()
+        self.pinned = set()
+        ## Evicted snaps waiting to be written as one chunk
+        self.spillBuffer = OrderedDict()
+        ## block -> chunk file
+        self.spilled = {}
+        self.chunks = 0
+        ## Last chunk read back, sequential access mostly hits the same one
+        self.loaded = (None, None)
+
+    # ===== Retention =====
+
+    def pin(self, block):
+        """
+        Keeps the snap of `block` in memory until unpinned
+        """
+        if block not in self.memory:
+            ## Raises KeyError for unknown blocks before anything is pinned
+            snap = self[block]
+            self.spillBuffer.pop(block, None)
+            self.spilled.pop(block, None)
+            self.memory[block] = snap
+        self.pinned.add(block)
+
+    def unpin(self, block):
+        self.pinned.discard(block)
+        self.evict()
+
+    def evict(self):
+        """
+        Moves the oldest unpinned snaps past maxInMemory to the spill buffer
+        Pinned snaps don't count towards maxInMemory
+        """
+        if self.maxInMemory is None:
+            return
+        unpinned = [block for block in self.memory if block not in self.pinned]
+        for block in unpinned[: max(len(unpinned) - self.maxInMemory, 0)]:
+            self.spillBuffer[block] = self.memory.pop(block)
+            if len(self.spillBuffer) >= self.chunkSize:
+                self.spill()
+
+    def spill(self):
+        """
+        Writes the spill buffer as one columnar chunk
+        """
+        if not self.spillBuffer:
+            return
+        if self.spillDir is None:
+            self.spillDir = tempfile.mkdtemp(prefix="snaps_")
+        os.makedirs(self.spillDir, exist_ok=True)
+
+        snaps = list(self.spillBuffer.values())
+        schema = snaps[0].schema
+        width = max(len(snap.values) for snap in snaps)
+        chunk = {
+            "keys": schema.keys[:width],
+            "blocks": list(self.spillBuffer.keys()),
+            "meta": [
+                [snap.block, snap.entityKeys, snap.failedKeys, snap.entities]
+                for snap in snaps
+            ],
+            "columns": [
+                [
+                    snap.values[index] if index < len(snap.values) else MISSING
+                    for snap in snaps
+                ]
+                for index in range(width)
+            ],
+        }
+
+        path = os.path.join(self.spillDir, "snaps_{}.pkl".format(self.chunks))
+        self.chunks += 1
+        with open(path, "wb") as f:
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        for block in chunk["blocks"]:
+            self.spilled[block] = (path, schema)
+        self.spillBuffer.clear()
+
+    def load(self, block):
+        path, schema = self.spilled[block]
+        if self.loaded[0] != path:
+            with open(path, "rb") as f:
+                self.loaded = (path, pickle.load(f))
+        chunk = self.loaded[1]
+        row = chunk["blocks"].index(block)
+        snapBlock, entityKeys, failedKeys, entities = chunk["meta"][row]
+
+        snap = Snap({}, snapBlock, entityKeys, failedKeys, entities, schema)
+        ## Chunk keys are a prefix of the (append-only) schema
+        snap.values = [column[row] for column in chunk["columns"]]
+        return snap
+
+    # ===== Mapping =====
+
+    def __getitem__(self, block):
+        if block in self.memory:
+            return self.memory[block]
+        if block in self.spillBuffer:
+            return self.spillBuffer[block]
+        if block in self.spilled:
+            return self.load(block)
+        raise KeyError(block)
+
+    def __setitem__(self, block, snap):
+        self.spillBuffer.pop(block, None)
+        self.spilled.pop(block, None)
+        self.memory[block] = snap
+        self.memory.move_to_end(block)
+        self.evict()
+
+    def __delitem__(self, block):
+        if block in self.memory:
+            del self.memory[block]
+        elif block in self.spillBuffer:
+            del self.spillBuffer[block]
+        elif block in self.spilled:
+            del self.spilled[block]
+        else:
+            raise KeyError(block)
+        self.pinned.discard(block)
+
+    def __contains__(self, block):
+        return (
+            block in self.memory or block in self.spillBuffer or block in self.spilled
+        )
+
+    def __iter__(self):
+        return iter(
+            sorted(set(self.memory) | set(self.spillBuffer) | set(self.spilled))
+        )
+
+    def __len__(self):
+        return len(set(self.memory) | set(self.spillBuffer) | set(self.spilled))
@@ -0,0 +1,50 @@
+from helpers.snapshot.dirty import PARAMS, changed_params
+
+"""
+  Sett parameters (see dirty.PARAMS) read once per manager and reused by every snap
+"""
+
+
+class ParamCache:
+    """
+    key -> (block, value) of the PARAMS a manager read
+    observe(tx) drops the ones the tx set, values are only reused for blocks at or after
+    the one they were read at
+    NOTE: Setters only get noticed through observe, and a chain revert past the block a value
+    was read at isn't noticed, keep a manager per test / fork
+    """
+
+    def __init__(self, core):
+        ## Contracts whose setter events / selectors count, the sett and strategy
+        self.core = {address.lower() for address in core}
+        self.values = {}
+
+    def observe(self, tx):
+        for key in changed_params(tx, self.core):
+            self.values.pop(key, None)
+
+    def clear(self):
+        self.values = {}
+
+    def split(self, calls, block):
+        """
+        Returns (calls still to make, key -> cached value for the ones served from the cache)
+        """
+        remaining = []
+        cached = {}
+        for call in calls:
+            key = call.returns[0][0]
+            value = self.values.get(key)
+            if len(call.returns) == 1 and value is not None and value[0] <= block:
+                cached[key] = value[1]
+            else:
+                remaining.append(call)
+        return remaining, cached
+
+    def update(self, data, failedKeys, block):
+        """
+        Keeps the PARAMS read at `block` that aren't cached yet
+        """
+        for key in PARAMS:
+            if key in data and key not in failedKeys and key not in self.values:
+                self.values[key] = (block, data[key])
@@ -1,23 +1,136 @@
+BALANCE_FIELDS = ("balances", "shares")
+
+
+class Missing:
+    """
+    Marks a schema key a Snap has no value for, None is a valid value (failed call default)
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __reduce__(self):
+        ## Unpickles to the module singleton
+        return "MISSING"
+
+
+MISSING = Missing()
+
+
+class SnapSchema:
+    """
+    Key layout shared by every Snap of a SnapshotManager
+    Keys are interned once and only ever appended, so a key keeps its index for good
+    """
+
+    __slots__ = ("keys", "index", "balanceIndex")
+
+    def __init__(self, keys=None):
+        self.keys = []
+        self.index = {}
+        ## (field, tokenKey, accountKey) -> index, for balances() / shares()
+        self.balanceIndex = {}
+        for key in keys or []:
+            self.add(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        if key in self.index:
+            return self.index[key]
+        index = len(self.keys)
+        self.keys.append(key)
+        self.index[key] = index
+
+        parts = key.split(".", 2)
+        if len(parts) == 3 and parts[0] in BALANCE_FIELDS:
+            self.balanceIndex[tuple(parts)] = index
+        return index
+
+
 class Snap:
-    def __init__(self, data, block, entityKeys):
-        self.data = data
+    __slots__ = (
+        "schema",
+        "values",
+        "block",
+        "entityKeys",
+        "failedKeys",
+        "entities",
+    )
+
+    def __init__(
+        self,
+        data,
+        block,
+        entityKeys,
+        failedKeys=None,
+        entities=None,
+        schema=None,
+        base=None,
+    ):
+        """
+        data: key -> value, stored as a list aligned with the (shared) schema
+        base: Snap with the same schema whose values are carried forward for keys not in data
+        """
+        self.schema = schema if schema is not None else SnapSchema()
+        self.values = list(base.values) if base is not None else []
         self.block = block
         self.entityKeys = entityKeys
+        ## Keys whose call reverted, their value is the multicall default
+        self.failedKeys = failedKeys or []
+        ## entityKey -> address the balances were read for
+        self.entities = entities or {}
+
+        for key, value in data.items():
+            self.set(key, value)
+
+    @property
+    def data(self):
+        """
+        key -> value dict, built on demand
+        """
+        return dict(self.items())
+
+    def items(self):
+        for key, value in zip(self.schema.keys, self.values):
+            if value is not MISSING:
+                yield key, value
+
+    def has(self, key):
+        index = self.schema.index.get(key)
+        return (
+            index is not None
+            and index < len(self.values)
+            and self.values[index] is not MISSING
+        )
+
+    def value(self, index, key):
+        if index is None or index >= len(self.values) or self.values[index] is MISSING:
+            raise KeyError(key)
+        return self.values[index]
 
     # ===== Getters =====
 
     def balances(self, tokenKey, accountKey):
-        return self.data["balances." + tokenKey + "." + accountKey]
+        index = self.schema.balanceIndex.get(("balances", tokenKey, accountKey))
+        return self.value(index, "balances." + tokenKey + "." + accountKey)
 
     def shares(self, tokenKey, accountKey):
-        return self.data["shares." + tokenKey + "." + accountKey]
+        index = self.schema.balanceIndex.get(("shares", tokenKey, accountKey))
+        return self.value(index, "shares." + tokenKey + "." + accountKey)
 
     def get(self, key):
-        if key not in self.data.keys():
+        if not self.has(key):
             raise Exception("Key {} not found in snap data".format(key))
-        return self.data[key]
+        return self.values[self.schema.index[key]]
 
     # ===== Setters =====
 
     def set(self, key, value):
-        self.data[key] = value
+        index = self.schema.add(key)
+        if index >= len(self.values):
+            self.values.extend([MISSING] * (index + 1 - len(self.values)))
+        self.values[index] = value
@@ -0,0 +1,66 @@
+import itertools
+
+from helpers.snapshot.snap import BALANCE_FIELDS
+
+"""
+  Snap calls compiled once and reused by every snap of a manager
+"""
+
+
+class SnapTemplate:
+    """
+    fieldCalls(entities) -> [Call], built on first use and never again
+    entityCalls(entities) -> [Call], the calls reading one entity, in the same token order for each
+    Calls of an entity are built when it shows up (or its address changes), so tracked users
+    only add their own calls. Calldata is encoded when a call is compiled
+    """
+
+    def __init__(self, fieldCalls, entityCalls):
+        self.fieldCalls = fieldCalls
+        self.entityCalls = entityCalls
+        self.fields = None
+        ## entityKey -> (address, [Call])
+        self.entities = {}
+        ## tokenKey -> address of the token balances / shares are read on
+        self.tokens = {}
+        ## (entity items, calls) of the last calls() result
+        self.compiled = (None, None)
+
+    def compile(self, calls):
+        for call in calls:
+            call.data
+            parts = call.returns[0][0].split(".", 2)
+            if len(parts) == 3 and parts[0] in BALANCE_FIELDS:
+                self.tokens[parts[1]] = call.target
+        return calls
+
+    def calls(self, entities):
+        """
+        Snap calls for `entities` (entityKey -> address)
+        Balances come first, token by token, then the fields, like the resolver builds them
+        """
+        key = tuple(entities.items())
+        if self.compiled[0] == key:
+            return self.compiled[1]
+
+        if self.fields is None:
+            self.fields = self.compile(self.fieldCalls(dict(entities)))
+        for entityKey, address in entities.items():
+            known = self.entities.get(entityKey)
+            if known is None or known[0] != address:
+                self.entities[entityKey] = (
+                    address,
+                    self.compile(self.entityCalls({entityKey: address})),
+                )
+
+        ## Transposed, the i-th call of each entity reads the same token
+        groups = [self.entities[entityKey][1] for entityKey in entities]
+        calls = [
+            call
+            for calls in itertools.zip_longest(*groups)
+            for call in calls
+            if call is not None
+        ]
+        calls += self.fields
+        self.compiled = (key, calls)
+        return calls
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+
+from helpers.multicall import Call, Multicall, func
+from helpers.multicall.call import checksum_address
+
+"""
+  Process-wide decimals / symbol / name of tokens, read once per token
+  Tokens are fetched in bulk with one multicall, e.g. every token of a snapshot schema
+  With TOKEN_METADATA_PATH set (or a path given) the cache is kept in that JSON file across runs
+  NOTE: Entries aren't keyed by chain, use one file per chain
+"""
+
+TOKEN_METADATA_PATH = os.getenv("TOKEN_METADATA_PATH")
+FIELDS = [
+    ("decimals", func.erc20.decimals),
+    ("symbol", func.erc20.symbol),
+    ("name", func.erc20.name),
+]
+## Decimals assumed when a token doesn't implement decimals()
+DEFAULT_DECIMALS = 18
+
+
+class TokenMetadata:
+    def __init__(self, path=TOKEN_METADATA_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        ## address -> {"decimals", "symbol", "name"}, None for views the token lacks
+        self.tokens = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.tokens = json.load(f)
+
+    def __contains__(self, token):
+        return checksum_address(str(token)) in self.tokens
+
+    def fetch(self, tokens):
+        """
+        Reads the metadata of every token that isn't cached yet, in one multicall
+        """
+        missing = {checksum_address(str(token)) for token in tokens} - set(self.tokens)
+        if not missing:
+            return
+
+        calls = [
+            Call(token, [function], [[token + "." + field, None]])
+            for token in sorted(missing)
+            for field, function in FIELDS
+        ]
+        data = Multicall(calls, require_success=False)()
+
+        with self.lock:
+            for token in missing:
+                self.tokens[token] = {
+                    field: data[token + "." + field] for field, _ in FIELDS
+                }
+            if self.path:
+                self.save()
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.tokens, f, indent=2, sort_keys=True)
+
+    def get(self, token):
+        token = checksum_address(str(token))
+        if token not in self.tokens:
+            self.fetch([token])
+        return self.tokens[token]
+
+    def decimals(self, token):
+        decimals = self.get(token)["decimals"]
+        return DEFAULT_DECIMALS if decimals is None else decimals
+
+    def symbol(self, token):
+        return self.get(token)["symbol"]
+
+    def name(self, token):
+        return self.get(token)["name"]
+
+
+tokenMetadata = TokenMetadata()
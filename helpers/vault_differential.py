@@ -0,0 +1,195 @@
+import copy
+import random
+
+import brownie
+from brownie import chain, interface
+
+from helpers.vault_simulator import VaultSimulator, SimulatedRevert, SETT, STRATEGY
+
+"""
+  Cross-checks VaultSimulator against the contracts on the local (forked) chain
+  A scenario is a list of actions, users are keys of trackedUsers:
+  ("deposit", userKey, amount), ("depositAll", userKey), ("earn",), ("harvest",),
+  ("withdraw", userKey, shares), ("withdrawAll", userKey), ("processExpiredLocks",), ("sleep", seconds)
+"""
+
+## Keys of the snaps compared between simulator and chain
+COMPARED_PREFIXES = ("sett.", "strategy.", "balances.want.", "balances.sett.")
+## The simulator mints the treasury fees in the steps of shares_math.get_report_fees
+## so shares can be off by rounding
+TOLERANCE_WEI = 10
+## Shares of holders that aren't tracked
+OTHERS = "others"
+
+
+def simulator_from_chain(manager, users):
+    """
+    VaultSimulator holding the current on chain state of manager's sett and strategy
+    users: key -> address, their want and shares are copied over
+    """
+    sett = manager.sett
+    strategy = manager.strategy
+    want = manager.want
+    locker = interface.IVlOxd(strategy.LOCKER())
+    sim = VaultSimulator(
+        sett.performanceFeeGovernance(),
+        sett.performanceFeeStrategist(),
+        sett.withdrawalFee(),
+        sett.managementFee(),
+        sett.toEarnBps(),
+        strategy.withdrawalMaxDeviationThreshold(),
+        strategy.withdrawalSafetyCheck(),
+        timestamp=chain.time(),
+        decimals=sett.decimals(),
+        treasury=sett.treasury(),
+        strategist=sett.strategist(),
+    )
+    sim.lastHarvestedAt = sett.lastHarvestedAt()
+    sim.locker.locks[STRATEGY] = [
+        [amount, unlockTime]
+        for amount, _, unlockTime in locker.lockedBalances(strategy)[3]
+    ]
+    sim.minted = sim.balanceOfPool()
+
+    sim.mint(SETT, want.balanceOf(sett))
+    sim.mint(STRATEGY, want.balanceOf(strategy))
+    for address in set(users.values()) | {sim.treasury, sim.strategist}:
+        sim.mint(address, want.balanceOf(address))
+        sim.shares[address] = sett.balanceOf(address)
+    sim.totalSupply = sett.totalSupply()
+    sim.shares[OTHERS] = sim.totalSupply - sum(sim.shares.values())
+    return sim
+
+
+def resolve(action, users):
+    """
+    Action with its user key replaced by the user's address
+    """
+    if action[0] in ("deposit", "depositAll", "withdraw", "withdrawAll"):
+        return (action[0], users[action[1]]) + tuple(action[2:])
+    return action
+
+
+def run_on_simulator(sim, action, harvested=None):
+    name, args = action[0], action[1:]
+    if name == "harvest":
+        return sim.harvest(harvested)
+    return getattr(sim, name)(*args)
+
+
+def run_on_chain(manager, action, accounts, governance):
+    """
+    Returns the tx, None for sleep
+    """
+    sett = manager.sett
+    strategy = manager.strategy
+    name, args = action[0], action[1:]
+    if name == "sleep":
+        chain.sleep(args[0])
+        chain.mine()
+        return None
+    if name == "deposit":
+        return sett.deposit(args[1], {"from": accounts[args[0]]})
+    if name == "depositAll":
+        return sett.depositAll({"from": accounts[args[0]]})
+    if name == "earn":
+        return sett.earn({"from": governance})
+    if name == "harvest":
+        return strategy.harvest({"from": governance})
+    if name == "withdraw":
+        return sett.withdraw(args[1], {"from": accounts[args[0]]})
+    if name == "withdrawAll":
+        return sett.withdrawAll({"from": accounts[args[0]]})
+    if name == "processExpiredLocks":
+        return strategy.manualProcessExpiredLocks({"from": governance})
+    raise ValueError("Unknown action {}".format(name))
+
+
+def compare_snaps(simSnap, chainSnap):
+    """
+    Returns [(key, simulated, actual)] for values that differ by more than TOLERANCE_WEI
+    """
+    mismatches = []
+    for key, value in simSnap.items():
+        if not key.startswith(COMPARED_PREFIXES) or not chainSnap.has(key):
+            continue
+        actual = chainSnap.get(key)
+        if abs(value - actual) > TOLERANCE_WEI:
+            mismatches.append((key, value, actual))
+    return mismatches
+
+
+def replay(manager, scenario, trackedUsers, governance):
+    """
+    Runs the scenario on chain and on a simulator started from the same state
+    The simulator clock follows the mined blocks, harvests use the amount the chain reported
+    Returns [(step, key, simulated, actual)], key "reverted" marks a step only one side reverted
+    The chain is reverted to where it started afterwards
+    """
+    users = {key: getattr(user, "address", user) for key, user in trackedUsers.items()}
+    accounts = {
+        key: brownie.accounts.at(address, force=True) for key, address in users.items()
+    }
+    ## A snapshot of our own, chain.snapshot() would replace the caller's
+    snapshotId = chain._take_snapshot()
+    try:
+        sim = simulator_from_chain(manager, users)
+        mismatches = []
+        for step, action in enumerate(scenario):
+            try:
+                tx = run_on_chain(manager, action, accounts, governance)
+                chainReverted = False
+            except brownie.exceptions.VirtualMachineError:
+                tx = None
+                chainReverted = True
+
+            sim.advanceTo(tx.timestamp if tx is not None else chain.time())
+            simReverted = False
+            if action[0] != "sleep":
+                harvested = None
+                if tx is not None and action[0] == "harvest":
+                    harvested = tx.events["Harvested"]["amount"]
+                try:
+                    run_on_simulator(sim, resolve(action, users), harvested)
+                except SimulatedRevert:
+                    simReverted = True
+
+            if chainReverted != simReverted:
+                mismatches.append((step, "reverted", simReverted, chainReverted))
+                break
+            mismatches += [
+                (step,) + mismatch
+                for mismatch in compare_snaps(
+                    sim.snap(users), manager.snap(trackedUsers)
+                )
+            ]
+        return mismatches
+    finally:
+        chain._revert(snapshotId)
+
+
+def differential(manager, scenarios, trackedUsers, governance, sample=0.05, seed=0):
+    """
+    Runs every scenario on the simulator (checking its invariants)
+    and replays a random `sample` fraction of them on chain as well
+    Returns {scenarioIndex: mismatches} for the replayed scenarios that diverged
+    """
+    users = {key: getattr(user, "address", user) for key, user in trackedUsers.items()}
+    start = simulator_from_chain(manager, users)
+    for scenario in scenarios:
+        sim = copy.deepcopy(start)
+        for action in scenario:
+            try:
+                run_on_simulator(sim, resolve(action, users))
+            except SimulatedRevert:
+                pass
+        sim.checkInvariants()
+
+    rng = random.Random(seed)
+    count = min(len(scenarios), max(1, round(len(scenarios) * sample)))
+    diverged = {}
+    for index in sorted(rng.sample(range(len(scenarios)), count)):
+        mismatches = replay(manager, scenarios[index], trackedUsers, governance)
+        if mismatches:
+            diverged[index] = mismatches
+    return diverged
@@ -0,0 +1,470 @@
+import copy
+import functools
+
+from helpers.shares_math import (
+    MAX_BPS,
+    SECS_PER_YEAR,
+    get_report_fees,
+    get_performance_fees_want,
+    get_management_fees_want,
+)
+from helpers.snapshot.snap import Snap, SnapSchema
+from _setup.config import (
+    PERFORMANCE_FEE_GOVERNANCE,
+    PERFORMANCE_FEE_STRATEGIST,
+    WITHDRAWAL_FEE,
+    MANAGEMENT_FEE,
+)
+
+"""
+  Pure Python model of TheVault + MyStrategy + the vlOXD locker
+  Follows the contracts' integer math so scenarios can be run without an EVM
+  Reverts are raised as SimulatedRevert with the contracts' revert string, leaving state untouched
+"""
+
+WEEK = 7 * 24 * 3600
+## vlOXD locks into the current weekly epoch and unlocks 16 weeks after it
+LOCK_DURATION = 16 * WEEK
+
+## TheVault / BaseStrategy defaults
+TO_EARN_BPS = 9_500
+WITHDRAWAL_MAX_DEVIATION_THRESHOLD = 50
+## MyStrategy.withdrawalSafetyCheck tolerance, 20 BP of slippage
+WITHDRAWAL_SAFETY_BPS = 9_980
+
+## Simulator accounts of the vault and strategy
+SETT = "sett"
+STRATEGY = "strategy"
+
+
+class SimulatedRevert(Exception):
+    pass
+
+
+def transaction(fn):
+    """
+    Restores the simulator state if the action reverts, like the EVM would
+    """
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        state = copy.deepcopy(self.state())
+        try:
+            result = fn(self, *args, **kwargs)
+        except SimulatedRevert:
+            self.restore(state)
+            raise
+        self.block += 1
+        return result
+
+    return wrapper
+
+
+def require(condition, message):
+    if not condition:
+        raise SimulatedRevert(message)
+
+
+def div(a, b):
+    require(b > 0, "SafeMath: division by zero")
+    return a // b
+
+
+class SimulatedLocker:
+    def __init__(self, rewardApr=0):
+        """
+        rewardApr: rewards in want per year on the locked balance, in bps
+        (stands in for the oxSOLID rewards MyStrategy swaps to OXD)
+        """
+        self.rewardApr = rewardApr
+        ## account -> [[amount, unlockTime]] in unlock order
+        self.locks = {}
+        self.rewards = {}
+
+    def lock(self, account, amount, timestamp):
+        require(amount > 0, "Cannot stake 0")
+        unlockTime = timestamp // WEEK * WEEK + LOCK_DURATION
+        locks = self.locks.setdefault(account, [])
+        if locks and locks[-1][1] == unlockTime:
+            locks[-1][0] += amount
+        else:
+            locks.append([amount, unlockTime])
+
+    def lockedBalanceOf(self, account):
+        return sum(amount for amount, _ in self.locks.get(account, []))
+
+    def unlockable(self, account, timestamp):
+        return sum(
+            amount
+            for amount, unlockTime in self.locks.get(account, [])
+            if unlockTime <= timestamp
+        )
+
+    def processExpiredLocks(self, account, timestamp):
+        """
+        Returns the amount unlocked
+        """
+        locks = self.locks.get(account, [])
+        require(len(locks) > 0, "no locks")
+        unlocked = self.unlockable(account, timestamp)
+        require(unlocked > 0, "no exp locks")
+        self.locks[account] = [lock for lock in locks if lock[1] > timestamp]
+        return unlocked
+
+    def accrue(self, seconds):
+        for account in self.locks:
+            self.rewards[account] = (
+                self.rewards.get(account, 0)
+                + self.lockedBalanceOf(account)
+                * self.rewardApr
+                * seconds
+                // SECS_PER_YEAR
+                // MAX_BPS
+            )
+
+    def getReward(self, account):
+        return self.rewards.pop(account, 0)
+
+
+class VaultSimulator:
+    def __init__(
+        self,
+        performanceFeeGovernance=PERFORMANCE_FEE_GOVERNANCE,
+        performanceFeeStrategist=PERFORMANCE_FEE_STRATEGIST,
+        withdrawalFee=WITHDRAWAL_FEE,
+        managementFee=MANAGEMENT_FEE,
+        toEarnBps=TO_EARN_BPS,
+        withdrawalMaxDeviationThreshold=WITHDRAWAL_MAX_DEVIATION_THRESHOLD,
+        withdrawalSafetyCheck=False,
+        rewardApr=0,
+        timestamp=0,
+        decimals=18,
+        treasury="treasury",
+        strategist="strategist",
+    ):
+        """
+        Accounts are plain keys or addresses, fund them with mint()
+        """
+        self.performanceFeeGovernance = performanceFeeGovernance
+        self.performanceFeeStrategist = performanceFeeStrategist
+        self.withdrawalFee = withdrawalFee
+        self.managementFee = managementFee
+        self.toEarnBps = toEarnBps
+        self.withdrawalMaxDeviationThreshold = withdrawalMaxDeviationThreshold
+        self.withdrawalSafetyCheck = withdrawalSafetyCheck
+        self.decimals = decimals
+        self.treasury = treasury
+        self.strategist = strategist
+
+        self.timestamp = timestamp
+        self.lastHarvestedAt = timestamp
+        self.block = 0
+        self.locker = SimulatedLocker(rewardApr)
+        ## account -> want balance, SETT and STRATEGY included
+        self.want = {}
+        ## account -> vault shares
+        self.shares = {}
+        self.totalSupply = 0
+        ## Want that entered the system through mint() and rewards, for checkInvariants
+        self.minted = 0
+
+        self.schema = SnapSchema()
+
+    def state(self):
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in ("schema", "block")
+        }
+
+    def restore(self, state):
+        self.__dict__.update(state)
+
+    # ===== Tokens =====
+
+    def mint(self, account, amount):
+        """
+        Gives want to `account`, e.g. a whale transfer
+        """
+        self.want[account] = self.want.get(account, 0) + amount
+        self.minted += amount
+
+    def transfer(self, sender, recipient, amount):
+        require(
+            self.want.get(sender, 0) >= amount,
+            "ERC20: transfer amount exceeds balance",
+        )
+        self.want[sender] = self.want.get(sender, 0) - amount
+        self.want[recipient] = self.want.get(recipient, 0) + amount
+
+    def mintShares(self, account, amount, pool):
+        shares = (
+            amount if self.totalSupply == 0 else div(amount * self.totalSupply, pool)
+        )
+        self.shares[account] = self.shares.get(account, 0) + shares
+        self.totalSupply += shares
+        return shares
+
+    def burnShares(self, account, shares):
+        require(
+            self.shares.get(account, 0) >= shares, "ERC20: burn amount exceeds balance"
+        )
+        self.shares[account] -= shares
+        self.totalSupply -= shares
+
+    # ===== Views =====
+
+    def balanceOfWant(self):
+        return self.want.get(STRATEGY, 0)
+
+    def balanceOfPool(self):
+        return self.locker.lockedBalanceOf(STRATEGY)
+
+    def balanceOfStrategy(self):
+        return self.balanceOfWant() + self.balanceOfPool()
+
+    def balance(self):
+        return self.want.get(SETT, 0) + self.balanceOfStrategy()
+
+    def available(self):
+        return self.want.get(SETT, 0) * self.toEarnBps // MAX_BPS
+
+    def getPricePerFullShare(self):
+        if self.totalSupply == 0:
+            return 10**self.decimals
+        return self.balance() * 10**self.decimals // self.totalSupply
+
+    # ===== Time =====
+
+    def sleep(self, seconds):
+        self.locker.accrue(seconds)
+        self.timestamp += seconds
+
+    def advanceTo(self, timestamp):
+        if timestamp > self.timestamp:
+            self.sleep(timestamp - self.timestamp)
+
+    # ===== Vault actions =====
+
+    @transaction
+    def deposit(self, user, amount):
+        require(amount != 0, "Amount 0")
+        pool = self.balance()
+        self.transfer(user, SETT, amount)
+        return self.mintShares(user, amount, pool)
+
+    def depositAll(self, user):
+        return self.deposit(user, self.want.get(user, 0))
+
+    @transaction
+    def earn(self):
+        self.transfer(SETT, STRATEGY, self.available())
+        amount = self.balanceOfWant()
+        if amount > 0:
+            self.lockWant(amount)
+
+    @transaction
+    def withdraw(self, user, shares):
+        """
+        Returns the want sent to the user
+        """
+        require(shares != 0, "0 Shares")
+        r = div(self.balance() * shares, self.totalSupply)
+        self.burnShares(user, shares)
+
+        b = self.want.get(SETT, 0)
+        if b < r:
+            toWithdraw = r - b
+            self.strategyWithdraw(toWithdraw)
+            diff = self.want.get(SETT, 0) - b
+            if diff < toWithdraw:
+                r = b + diff
+
+        fee = r * self.withdrawalFee // MAX_BPS
+        self.transfer(SETT, user, r - fee)
+        if fee > 0:
+            self.mintShares(self.treasury, fee, self.balance() - fee)
+        return r - fee
+
+    def withdrawAll(self, user):
+        return self.withdraw(user, self.shares.get(user, 0))
+
+    @transaction
+    def harvest(self, harvested=None):
+        """
+        Claims the locker rewards and reports them to the vault, returns the harvested amount
+        harvested overrides the claimed rewards, e.g. with the amount a real harvest reported
+        """
+        rewards = self.locker.getReward(STRATEGY)
+        if harvested is None:
+            harvested = rewards
+        self.mint(STRATEGY, harvested)
+        self.reportHarvest(harvested)
+        return harvested
+
+    def tend(self):
+        raise SimulatedRevert("no op")
+
+    # ===== Strategy actions =====
+
+    @transaction
+    def processExpiredLocks(self):
+        self.unlockWant()
+
+    @transaction
+    def reinvest(self, processLocks=False):
+        if processLocks:
+            self.unlockWant()
+        amount = self.balanceOfWant()
+        self.lockWant(amount)
+        return amount
+
+    # ===== Internal =====
+
+    def lockWant(self, amount):
+        self.locker.lock(STRATEGY, amount, self.timestamp)
+        self.want[STRATEGY] -= amount
+
+    def unlockWant(self):
+        unlocked = self.locker.processExpiredLocks(STRATEGY, self.timestamp)
+        self.want[STRATEGY] = self.want.get(STRATEGY, 0) + unlocked
+
+    def strategyWithdraw(self, amount):
+        require(amount != 0, "Amount 0")
+        maxAmount = self.balanceOfWant()
+        if amount > maxAmount:
+            ## Reverts if no locks expired
+            self.unlockWant()
+            maxAmount = self.balanceOfWant()
+        if self.withdrawalSafetyCheck:
+            require(
+                maxAmount >= amount * WITHDRAWAL_SAFETY_BPS // MAX_BPS,
+                "Withdrawal Safety Check",
+            )
+
+        postWithdraw = self.balanceOfWant()
+        if postWithdraw < amount:
+            require(
+                amount - postWithdraw
+                <= amount * self.withdrawalMaxDeviationThreshold // MAX_BPS,
+                "withdraw-exceed-max-deviation-threshold",
+            )
+        self.transfer(STRATEGY, SETT, min(postWithdraw, amount))
+
+    def reportHarvest(self, harvested):
+        duration = self.timestamp - self.lastHarvestedAt
+        self.lastHarvestedAt = self.timestamp
+        if self.totalSupply == 0:
+            ## shares_math assumes existing shares, the first mint into an empty vault is 1:1
+            self.mintShares(
+                self.treasury,
+                get_performance_fees_want(harvested, self.performanceFeeGovernance)
+                + get_management_fees_want(
+                    self.balance() - harvested, duration, self.managementFee
+                ),
+                0,
+            )
+            strategistFee = get_performance_fees_want(
+                harvested, self.performanceFeeStrategist
+            )
+            if strategistFee > 0:
+                self.mintShares(
+                    self.strategist, strategistFee, self.balance() - strategistFee
+                )
+            return
+
+        fees = get_report_fees(
+            harvested,
+            self.performanceFeeGovernance,
+            self.performanceFeeStrategist,
+            self.managementFee,
+            duration,
+            self.totalSupply,
+            self.balance() - harvested,
+        )
+        for account, shares in (
+            (self.treasury, fees.shares_perf_treasury + fees.shares_management),
+            (self.strategist, fees.shares_perf_strategist),
+        ):
+            self.shares[account] = self.shares.get(account, 0) + shares
+            self.totalSupply += shares
+
+    # ===== Checks =====
+
+    def checkInvariants(self):
+        assert sum(self.shares.values()) == self.totalSupply
+        assert all(balance >= 0 for balance in self.want.values())
+        assert sum(self.want.values()) + self.balanceOfPool() == self.minted
+
+    def snap(self, trackedUsers=None):
+        """
+        Snap of the simulated state, keyed like SnapshotManager's snaps
+        """
+        entities = {
+            "sett": SETT,
+            "strategy": STRATEGY,
+            "treasury": self.treasury,
+            "strategist": self.strategist,
+        }
+        entities.update(trackedUsers or {})
+        data = {
+            "sett.balance": self.balance(),
+            "sett.available": self.available(),
+            "sett.getPricePerFullShare": self.getPricePerFullShare(),
+            "sett.decimals": self.decimals,
+            "sett.totalSupply": self.totalSupply,
+            "sett.withdrawalFee": self.withdrawalFee,
+            "sett.managementFee": self.managementFee,
+            "sett.lastHarvestedAt": self.lastHarvestedAt,
+            "sett.performanceFeeGovernance": self.performanceFeeGovernance,
+            "sett.performanceFeeStrategist": self.performanceFeeStrategist,
+            "strategy.balanceOfPool": self.balanceOfPool(),
+            "strategy.balanceOfWant": self.balanceOfWant(),
+            "strategy.balanceOf": self.balanceOfStrategy(),
+        }
+        for key, account in entities.items():
+            data["balances.want." + key] = self.want.get(account, 0)
+            data["balances.sett." + key] = self.shares.get(account, 0)
+        return Snap(
+            data, self.block, list(entities), entities=entities, schema=self.schema
+        )
+
+    # ===== SnapshotManager surface =====
+
+    def settDeposit(self, amount, overrides, confirm=True):
+        self.deposit(sender(overrides), amount)
+        if confirm:
+            self.checkInvariants()
+
+    def settDepositAll(self, overrides, confirm=True):
+        self.depositAll(sender(overrides))
+        if confirm:
+            self.checkInvariants()
+
+    def settEarn(self, overrides, confirm=True):
+        self.earn()
+        if confirm:
+            self.checkInvariants()
+
+    def settHarvest(self, overrides, confirm=True):
+        self.harvest()
+        if confirm:
+            self.checkInvariants()
+
+    def settTend(self, overrides, confirm=True):
+        self.tend()
+
+    def settWithdraw(self, amount, overrides, confirm=True):
+        self.withdraw(sender(overrides), amount)
+        if confirm:
+            self.checkInvariants()
+
+    def settWithdrawAll(self, overrides, confirm=True):
+        self.withdrawAll(sender(overrides))
+        if confirm:
+            self.checkInvariants()
+
+
+def sender(overrides):
+    account = overrides["from"]
+    return getattr(account, "address", account)
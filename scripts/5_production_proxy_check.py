@@ -1,6 +1,8 @@
-from brownie import network, BadgerRegistry, Controller, TheVault, web3
+from brownie import network, BadgerRegistry, Controller, TheVault
 from config import REGISTRY
 from helpers.constants import AddressZero
+from helpers.multicall import RPCError
+from helpers.rpc_batch import RPCBatch
 from rich.console import Console
 
 console = Console()
@@ -59,30 +61,36 @@ def main():
         ["proxyAdminDfdBadger", "dfdBadgerSharedGovernance"],
     ]
 
-    check_by_keys(registry, proxyAdmin, keys)
-    check_vaults_and_strategies(registry, proxyAdmin, authors)
+    # Every proxy's ADMIN_SLOT is read in a single JSON-RPC batch
+    proxies = get_proxies_by_keys(registry, keys)
+    proxies += get_vaults_and_strategies(registry, authors)
+    check_proxy_admins(proxies, proxyAdmin)
+
     check_proxy_admin_owners(proxyAdminOwners, registry)
 
 
-def check_by_keys(registry, proxyAdmin, keys):
-    console.print("[blue]Checking proxyAdmins by key...[/blue]")
-    # Check the proxyAdmin of the different proxy contracts
+def get_proxies_by_keys(registry, keys):
+    console.print("[blue]Getting proxies by key...[/blue]")
+    # Collect the different proxy contracts
+    proxies = []
     for key in keys:
         proxy = registry.get(key)
         if proxy == AddressZero:
             console.print(key, ":[red] key doesn't exist on the registry![/red]")
             continue
-        check_proxy_admin(proxy, proxyAdmin, key)
+        proxies.append([proxy, key])
+    return proxies
 
 
-def check_vaults_and_strategies(registry, proxyAdmin, authors):
-    console.print("[blue]Checking proxyAdmins from vaults and strategies...[/blue]")
+def get_vaults_and_strategies(registry, authors):
+    console.print("[blue]Getting proxies from vaults and strategies...[/blue]")
 
     vaultStatus = [0, 1, 2]
 
     vaults = []
     strategies = []
     stratNames = []
+    proxies = []
 
     # get vaults by author
     for author in authors:
@@ -102,25 +110,36 @@ def check_vaults_and_strategies(registry, proxyAdmin, authors):
             controller = Controller.at(vaultContract.controller())
             strategies.append(controller.strategies(vaultContract.token()))
             stratNames.append(vaultContract.name().replace("Badger Sett ", "Strategy "))
-            # Check vault proxyAdmin
-
-            check_proxy_admin(vault, proxyAdmin, vaultContract.name())
+            # Vault proxyAdmin
+            proxies.append([vault, vaultContract.name()])
         except Exception as error:
             print("Something went wrong")
             print(error)
 
-    for strat in strategies:
-        try:
-            # Check strategies' proxyAdmin
-            check_proxy_admin(strat, proxyAdmin, stratNames[strategies.index(strat)])
-        except Exception as error:
+    # Strategies' proxyAdmin
+    proxies += [[strat, name] for strat, name in zip(strategies, stratNames)]
+    return proxies
+
+
+def check_proxy_admins(proxies, proxyAdmin):
+    """
+    Reads the ADMIN_SLOT of every [proxy, key] pair in a single JSON-RPC batch
+    """
+    console.print("[blue]Checking proxyAdmins...[/blue]")
+    batch = RPCBatch()
+    for proxy, key in proxies:
+        batch.get_storage_at(proxy, ADMIN_SLOT)
+
+    for (proxy, key), val in zip(proxies, batch.execute()):
+        if isinstance(val, RPCError):
             print("Something went wrong")
-            print(error)
+            print(val)
+            continue
+        check_proxy_admin(val, proxyAdmin, key)
 
 
-def check_proxy_admin(proxy, proxyAdmin, key):
-    # Get proxyAdmin address form the proxy's ADMIN_SLOT
-    val = web3.eth.getStorageAt(proxy, ADMIN_SLOT).hex()
+def check_proxy_admin(val, proxyAdmin, key):
+    # Get proxyAdmin address form the proxy's ADMIN_SLOT value
     address = "0x" + val[26:66]
 
     # Check differnt possible scenarios
@@ -138,11 +157,18 @@ def check_proxy_admin(proxy, proxyAdmin, key):
 def check_proxy_admin_owners(proxyAdminOwners, registry):
     console.print("[blue]Checking proxyAdmins' owners...[/blue]")
 
+    # Get proxyAdmins' owner addresses from slot 0 in a single batch
+    batch = RPCBatch()
+    owners = []
     for adminOwnerPair in proxyAdminOwners:
         proxyAdmin = registry.get(adminOwnerPair[0])
-        owner = registry.get(adminOwnerPair[1])
-        # Get proxyAdmin's owner address from slot 0
-        val = web3.eth.getStorageAt(proxyAdmin, 0).hex()
+        owners.append(registry.get(adminOwnerPair[1]))
+        batch.get_storage_at(proxyAdmin, 0)
+
+    for adminOwnerPair, owner, val in zip(proxyAdminOwners, owners, batch.execute()):
+        if isinstance(val, RPCError):
+            console.print(adminOwnerPair[0], ":[red] slot 0 read failed[/red] -", val)
+            continue
         address = "0x" + val[26:66]
 
         # Check differnt possible scenarios
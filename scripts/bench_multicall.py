@@ -0,0 +1,163 @@
+import time
+import tracemalloc
+
+from eth_abi import decode
+from eth_utils import to_checksum_address
+from rich.console import Console
+from tabulate import tabulate
+
+from helpers.multicall import Call, Signature, func, as_wei
+from helpers.multicall.call import checksum_address
+from helpers.multicall.signature import get_signature
+
+console = Console()
+
+## Shape of a SnapshotManager.snap() call list, scaled up
+TOKENS = {
+    "want": "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d",
+    "sett": "0x0000000000000000000000000000000000005e77",
+    "oxSolid": "0xDA0053F0bEfCbcaC208A3f867BB243716734D809",
+}
+SETT_FIELDS = [
+    func.sett.balance,
+    func.sett.available,
+    func.sett.getPricePerFullShare,
+    func.erc20.decimals,
+    func.erc20.totalSupply,
+    func.sett.withdrawalFee,
+    func.sett.managementFee,
+    func.sett.lastHarvestedAt,
+    func.sett.performanceFeeGovernance,
+    func.sett.performanceFeeStrategist,
+]
+ENTITY_COUNTS = [10, 100, 500]
+ROUNDS = 5
+DECODE_OUTPUTS = 10_000
+
+
+class LegacyCall(Call):
+    """
+    Call as it was built before Signatures were shared, used as the baseline
+    """
+
+    def __init__(self, target, function, returns=None):
+        self.target = to_checksum_address(target)
+        if isinstance(function, list):
+            self.function, *self.args = function
+        else:
+            self.function = function
+            self.args = None
+        self.signature = Signature(self.function)
+        self.returns = returns
+
+
+def make_entities(count):
+    return {
+        "entity" + str(i): "0x" + (i + 1).to_bytes(20, "big").hex()
+        for i in range(count)
+    }
+
+
+def build_calls(call_class, entities):
+    calls = []
+    for tokenKey, token in TOKENS.items():
+        for entityKey, entity in entities.items():
+            calls.append(
+                call_class(
+                    token,
+                    [func.erc20.balanceOf, entity],
+                    [["balances." + tokenKey + "." + entityKey, as_wei]],
+                )
+            )
+    for field in SETT_FIELDS:
+        calls.append(call_class(TOKENS["sett"], [field], [["sett." + field, as_wei]]))
+    return calls
+
+
+def measure(call_class, entities):
+    get_signature.cache_clear()
+    checksum_address.cache_clear()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        build_calls(call_class, entities)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    calls = build_calls(call_class, entities)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(calls) == len(TOKENS) * len(entities) + len(SETT_FIELDS)
+
+    return elapsed, retained, peak
+
+
+def measure_decode(signature, outputs):
+    start = time.perf_counter()
+    for output in outputs:
+        decode([signature.output_types], output)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for output in outputs:
+        signature.decode_data(output)
+    current = time.perf_counter() - start
+
+    return legacy, current
+
+
+def main():
+    """
+    Micro-benchmark for building the snapshot call list
+    Compares fresh Signatures per Call (legacy) against the shared Signature cache
+    and eth_abi.decode against the precompiled Signature decoders
+    """
+    table = []
+    for count in ENTITY_COUNTS:
+        entities = make_entities(count)
+        for name, call_class in [("legacy", LegacyCall), ("cached", Call)]:
+            elapsed, retained, peak = measure(call_class, entities)
+            table.append(
+                [
+                    count,
+                    name,
+                    "{:.2f}".format(elapsed * 1000),
+                    "{:,}".format(retained),
+                    "{:,}".format(peak),
+                ]
+            )
+
+    console.print("[green]=== Snapshot call list build ===[/green]")
+    print(
+        tabulate(
+            table,
+            headers=["entities", "mode", "ms / build", "retained B", "peak B"],
+            tablefmt="grid",
+        )
+    )
+
+    table = []
+    for function in [func.erc20.balanceOf, func.strategy.isTendable]:
+        signature = get_signature(function)
+        outputs = [(i % 2).to_bytes(32, "big") for i in range(DECODE_OUTPUTS)]
+        legacy, current = measure_decode(signature, outputs)
+        table.append(
+            [
+                function,
+                "{:.2f}".format(legacy * 1000),
+                "{:.2f}".format(current * 1000),
+            ]
+        )
+
+    console.print("[green]=== Decode {:,} outputs ===[/green]".format(DECODE_OUTPUTS))
+    print(
+        tabulate(
+            table,
+            headers=["signature", "eth_abi.decode ms", "Signature ms"],
+            tablefmt="grid",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+from rich.console import Console
+from tabulate import tabulate
+
+from helpers.fee_sweep import FeeSweep
+
+console = Console()
+
+## Grid to sweep, fees and APR in bps, ~1.2M points
+SWEEP = dict(
+    performanceFeeGovernance=range(0, 3_001, 100),
+    performanceFeeStrategist=[0, 250, 500],
+    managementFee=range(0, 401, 50),
+    withdrawalFee=range(0, 51, 10),
+    harvestInterval=[day * 24 * 3600 for day in (1, 2, 3, 7, 14, 30)],
+    tvl=[amount * 10**18 for amount in (10_000, 100_000, 1_000_000, 10_000_000)],
+    grossApr=range(500, 5_001, 500),
+)
+OUTPUT = "fee_sweep.npz"
+
+
+def main():
+    sweep = FeeSweep(**SWEEP)
+    console.print("Sweeping {} points".format(len(sweep)))
+    start = time.perf_counter()
+    surfaces = sweep.run()
+    console.print("Done in {:.2f}s".format(time.perf_counter() - start))
+
+    ## Axes are saved as floats, they are only labels
+    np.savez(
+        OUTPUT,
+        depositorYield=surfaces.depositorYield,
+        treasuryRevenue=surfaces.treasuryRevenue,
+        **{
+            axis: np.array(values, dtype=np.float64)
+            for axis, values in surfaces.axes.items()
+        },
+    )
+    console.print("Surfaces saved to {}".format(OUTPUT))
+
+    ## Average over every other axis, per governance performance fee
+    table = [
+        [
+            fee,
+            "{:.2%}".format(surfaces.depositorYield[i].mean()),
+            "{:.2%}".format(
+                (
+                    surfaces.treasuryRevenue[i]
+                    / np.array(SWEEP["tvl"], dtype=np.float64)[:, None]
+                ).mean()
+            ),
+        ]
+        for i, fee in enumerate(surfaces.axes["performanceFeeGovernance"])
+    ]
+    print(
+        tabulate(
+            table,
+            headers=["performanceFeeGovernance", "depositor APR", "treasury % of TVL"],
+        )
+    )
@@ -17,6 +17,13 @@ from _setup.config import (
     MANAGEMENT_FEE,
 )
 from helpers.constants import MaxUint256
+from helpers.evm_layers import EvmLayers
+from helpers.fork_network import (
+    configure_worker,
+    network_id,
+    record_fork,
+    worker_input,
+)
 from rich.console import Console
 
 console = Console()
@@ -24,6 +31,30 @@ console = Console()
 from dotmap import DotMap
 import pytest
 
+## Setup fixtures are built once per session and restored from EVM snapshots
+layers = EvmLayers()
+
+
+## Parallel runs (brownie test -n auto), every worker gets its own fork ##
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    ## Master, hands every worker the same fork block
+    node.workerinput.update(worker_input(network_id()))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    ## Runs before brownie launches ganache
+    network = network_id()
+    if hasattr(config, "workerinput"):
+        network = config.workerinput["network"] or network
+        configure_worker(config.workerinput)
+    elif getattr(config.option, "numprocesses", None):
+        ## xdist master, launches no ganache, the workers record their own forks
+        return
+    ## RPC_CACHE_MODE=record|replay reads the fork's upstream state through a local cache
+    record_fork(network)
+
 
 ## Accounts ##
 @pytest.fixture
@@ -38,6 +69,7 @@ def user():
 
 ## Fund the account
 @pytest.fixture
+@layers.layer("want")
 def want(deployer):
     """
     TODO: Customize this so you have the token you need for the strat
@@ -91,6 +123,7 @@ def badgerTree():
 
 
 @pytest.fixture
+@layers.layer("deployed", parent="want")
 def deployed(
     want,
     deployer,
@@ -188,6 +221,7 @@ def withdrawalFee(deployed):
 
 
 @pytest.fixture
+@layers.layer("setup_share_math", parent="deployed")
 def setup_share_math(deployer, vault, want, governance):
 
     depositAmount = int(want.balanceOf(deployer) * 0.5)
@@ -201,6 +235,7 @@ def setup_share_math(deployer, vault, want, governance):
 
 
 @pytest.fixture
+@layers.layer("setup_strat", parent="deployed")
 def setup_strat(governance, deployer, vault, strategy, want):
     """
     Convenience fixture that depoists and harvests for us
@@ -228,7 +263,13 @@ def setup_strat(governance, deployer, vault, strategy, want):
     return strategy
 
 
-## Forces reset before each test
+## Replaces brownie's, which resets the chain and with it every layer
+@pytest.fixture(scope="module")
+def module_isolation():
+    yield
+
+
+## Forces reset before each test, to the deepest setup layer it uses
 @pytest.fixture(autouse=True)
-def isolation(fn_isolation):
-    pass
+def isolation(module_isolation, request):
+    layers.restore(layers.deepest(request.fixturenames))
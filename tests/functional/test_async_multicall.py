@@ -0,0 +1,95 @@
+import asyncio
+
+from aiohttp import web
+from brownie import *
+from helpers.multicall import AsyncRPC, AsyncMulticall, Call, Multicall, RPCError, func
+from helpers.multicall import as_wei
+
+STUB_CONCURRENCY = 4
+
+
+def snap_calls(vault, want, accounts):
+    calls = [
+        Call(vault.address, [func.erc20.totalSupply], [["sett.totalSupply", as_wei]]),
+        Call(vault.address, [func.sett.balance], [["sett.balance", as_wei]]),
+    ]
+    for i, account in enumerate(accounts):
+        calls.append(
+            Call(
+                want.address,
+                [func.erc20.balanceOf, account.address],
+                [["balances.want." + str(i), as_wei]],
+            )
+        )
+    return calls
+
+
+def test_async_multicall_matches_multicall(vault, want):
+    calls = snap_calls(vault, want, accounts)
+    expected = Multicall(calls)()
+
+    async def run():
+        async with AsyncRPC.from_brownie() as rpc:
+            return await AsyncMulticall(calls, max_calls_per_batch=3)(rpc)
+
+    assert asyncio.run(run()) == expected
+
+
+async def start_stub(storage):
+    """
+    Minimal JSON-RPC server, answers eth_getStorageAt from `storage` and records concurrency
+    """
+    stats = {"inFlight": 0, "maxInFlight": 0}
+
+    async def handle(request):
+        payload = await request.json()
+        stats["inFlight"] += 1
+        stats["maxInFlight"] = max(stats["maxInFlight"], stats["inFlight"])
+        await asyncio.sleep(0.01)
+        stats["inFlight"] -= 1
+
+        address, slot, block = payload["params"]
+        if address not in storage:
+            error = {"code": -32000, "message": "unknown account"}
+            return web.json_response(
+                {"jsonrpc": "2.0", "id": payload["id"], "error": error}
+            )
+        value = "0x" + storage[address].to_bytes(32, "big").hex()
+        return web.json_response(
+            {"jsonrpc": "2.0", "id": payload["id"], "result": value}
+        )
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, "http://127.0.0.1:{}/".format(port), stats
+
+
+def test_async_rpc_storage_reads_against_stub():
+    storage = {"0x" + (i + 1).to_bytes(20, "big").hex(): i for i in range(32)}
+
+    async def run():
+        runner, url, stats = await start_stub(storage)
+        try:
+            async with AsyncRPC(url, concurrency=STUB_CONCURRENCY) as rpc:
+                values = await asyncio.gather(
+                    *[rpc.get_storage_at(address, 0) for address in storage]
+                )
+                try:
+                    await rpc.get_storage_at("0x" + "00" * 20, 0)
+                    raised = None
+                except RPCError as error:
+                    raised = error
+        finally:
+            await runner.cleanup()
+        return values, raised, stats
+
+    values, raised, stats = asyncio.run(run())
+
+    assert [int(value, 16) for value in values] == list(storage.values())
+    assert raised.code == -32000
+    assert 1 < stats["maxInFlight"] <= STUB_CONCURRENCY
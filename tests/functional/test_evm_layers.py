@@ -0,0 +1,134 @@
+import itertools
+from types import SimpleNamespace
+
+from brownie.exceptions import RPCRequestError
+
+from helpers import evm_layers
+from helpers.evm_layers import BASE, EvmLayers
+
+
+class FakeChain:
+    """
+    Blocks and snapshots the way ganache keeps them
+    Reverting to a snapshot drops it and every later one, brownie's _revert then retakes it
+    """
+
+    def __init__(self, raiseUnknown=False):
+        self.raiseUnknown = raiseUnknown
+        self.blocks = ["0x0"]
+        ## snapshot id -> chain length
+        self.snapshots = {}
+        self.ids = itertools.count(1)
+        self.reverts = []
+
+    def mine(self):
+        self.blocks.append(hex(len(self.blocks)) + "." + str(next(self.ids)))
+
+    def _take_snapshot(self):
+        id = next(self.ids)
+        self.snapshots[id] = len(self.blocks)
+        return id
+
+    def _revert(self, id):
+        self.reverts.append(id)
+        if id not in self.snapshots:
+            if self.raiseUnknown:
+                raise RPCRequestError("invalid snapshot id")
+            return self._take_snapshot()
+        del self.blocks[self.snapshots[id] :]
+        self.snapshots = {
+            key: length for key, length in self.snapshots.items() if key < id
+        }
+        return self._take_snapshot()
+
+    def get_block(self, block):
+        return {"hash": self.blocks[-1]}
+
+
+def make_layers(monkeypatch, raiseUnknown=False):
+    chain = FakeChain(raiseUnknown)
+    monkeypatch.setattr(evm_layers, "chain", chain)
+    monkeypatch.setattr(evm_layers, "web3", SimpleNamespace(eth=chain))
+    layers = EvmLayers()
+    layers.parents.update(
+        {"want": BASE, "deployed": "want", "strat": "deployed", "math": "deployed"}
+    )
+    return layers, chain
+
+
+def build(chain, name, builds):
+    def fixture():
+        chain.mine()
+        builds.append(name)
+        return name
+
+    return fixture
+
+
+def setup(layers, chain, names, builds):
+    layers.restore(layers.deepest(names))
+    for name in names:
+        layers.get(name, build(chain, name, builds))
+
+
+def test_layers_are_built_once(monkeypatch):
+    layers, chain = make_layers(monkeypatch)
+    builds = []
+    setup(layers, chain, ["want", "deployed", "strat"], builds)
+    ## A test moves the chain, the next one starts from the layer again
+    chain.mine()
+    setup(layers, chain, ["want", "deployed", "strat"], builds)
+
+    assert builds == ["want", "deployed", "strat"]
+    assert len(chain.blocks) == 4
+
+
+def test_reverting_drops_later_layers(monkeypatch):
+    layers, chain = make_layers(monkeypatch)
+    builds = []
+    setup(layers, chain, ["want", "deployed", "strat"], builds)
+    setup(layers, chain, ["want"], builds)
+    assert set(layers.layers) == {BASE, "want"}
+
+    setup(layers, chain, ["want", "deployed"], builds)
+    assert builds == ["want", "deployed", "strat", "deployed"]
+    assert set(layers.layers) == {BASE, "want", "deployed"}
+
+
+def test_branches_are_not_snapshotted(monkeypatch):
+    layers, chain = make_layers(monkeypatch)
+    builds = []
+    setup(layers, chain, ["want", "deployed", "strat"], builds)
+    ## Built on top of strat, not on deployed
+    layers.get("math", build(chain, "math", builds))
+    assert "math" not in layers.layers
+    assert layers.current is None
+
+    setup(layers, chain, ["want", "deployed", "math"], builds)
+    assert "math" in layers.layers
+    assert builds == ["want", "deployed", "strat", "math", "math"]
+
+
+def test_layers_ganache_dropped_are_rebuilt(monkeypatch):
+    layers, chain = make_layers(monkeypatch)
+    builds = []
+    setup(layers, chain, ["want", "deployed"], builds)
+    ## e.g. a test reverting past the layers itself
+    chain._revert(layers.layers[BASE].snapshotId)
+    chain.mine()
+
+    setup(layers, chain, ["want", "deployed"], builds)
+    assert builds == ["want", "deployed", "want", "deployed"]
+    assert chain.blocks[-1] == layers.layers["deployed"].blockHash
+
+
+def test_unknown_snapshot_ids_are_rebuilt(monkeypatch):
+    layers, chain = make_layers(monkeypatch, raiseUnknown=True)
+    builds = []
+    setup(layers, chain, ["want", "deployed"], builds)
+    chain.snapshots.clear()
+    chain.mine()
+
+    setup(layers, chain, ["want", "deployed"], builds)
+    assert builds == ["want", "deployed", "want", "deployed"]
+    assert set(layers.layers) == {BASE, "want", "deployed"}
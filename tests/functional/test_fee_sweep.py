@@ -0,0 +1,86 @@
+import numpy as np
+
+from helpers import shares_math
+from helpers.fee_sweep import FeeSweep, VAULT_DECIMALS, evaluate
+from helpers.shares_math import MAX_BPS, SECS_PER_YEAR
+
+GRID = dict(
+    performanceFeeGovernance=[0, 1_000, 2_000],
+    performanceFeeStrategist=[0, 500],
+    managementFee=[0, 200],
+    withdrawalFee=[0, 10, 50],
+    harvestInterval=[24 * 3600, 7 * 24 * 3600],
+    tvl=[10_000 * 10**18, 3 * 10**24 + 7],
+    grossApr=[500, 3_000],
+)
+HOLDING_PERIOD = SECS_PER_YEAR // 2
+
+
+def scalar_point(
+    performanceFeeGovernance,
+    performanceFeeStrategist,
+    managementFee,
+    withdrawalFee,
+    harvestInterval,
+    tvl,
+    grossApr,
+):
+    """
+    One grid point with the scalar shares_math, as FeeSweep documents it
+    """
+    gain = tvl * grossApr * harvestInterval // SECS_PER_YEAR // MAX_BPS
+    fees = shares_math.get_report_fees(
+        gain,
+        performanceFeeGovernance,
+        performanceFeeStrategist,
+        managementFee,
+        harvestInterval,
+        tvl,
+        tvl,
+    )
+    treasuryShares = fees.shares_perf_treasury + fees.shares_management
+    ppfs = (
+        (tvl + gain)
+        * 10**VAULT_DECIMALS
+        // (tvl + treasuryShares + fees.shares_perf_strategist)
+    )
+    depositorValue = shares_math.from_shares_to_want(tvl, ppfs, VAULT_DECIMALS)
+    withdrawalFeeWant = shares_math.get_withdrawal_fees_in_want(
+        tvl, ppfs, VAULT_DECIMALS, withdrawalFee
+    )
+    treasuryValue = shares_math.from_shares_to_want(
+        treasuryShares, ppfs, VAULT_DECIMALS
+    )
+
+    harvestsPerYear = SECS_PER_YEAR / harvestInterval
+    exitsPerYear = SECS_PER_YEAR / HOLDING_PERIOD
+    depositorYield = (depositorValue / tvl) ** harvestsPerYear - 1
+    depositorYield -= withdrawalFeeWant / tvl * exitsPerYear
+    treasuryRevenue = treasuryValue * harvestsPerYear + withdrawalFeeWant * exitsPerYear
+    return depositorYield, treasuryRevenue
+
+
+def test_sweep_matches_scalar_shares_math():
+    sweep = FeeSweep(**GRID, holdingPeriod=HOLDING_PERIOD)
+    points = [0, 1, 97, len(sweep) // 2, len(sweep) - 1]
+
+    serial = FeeSweep(**GRID, holdingPeriod=HOLDING_PERIOD, max_workers=1).run()
+    ## Small chunks so the pool gets several of them
+    pooled = FeeSweep(
+        **GRID, holdingPeriod=HOLDING_PERIOD, max_workers=2, chunkSize=50
+    ).run()
+
+    for point in points:
+        index = np.unravel_index(point, sweep.shape)
+        values = [axis[i] for axis, i in zip(sweep.axes, index)]
+        expectedYield, expectedRevenue = scalar_point(*values)
+
+        yields, revenues = evaluate(sweep.axes, HOLDING_PERIOD, point, point + 1)
+        assert np.isclose(yields[0], expectedYield, rtol=1e-9)
+        assert np.isclose(revenues[0], expectedRevenue, rtol=1e-9)
+
+        for surfaces in (serial, pooled):
+            assert np.isclose(surfaces.depositorYield[index], expectedYield, rtol=1e-9)
+            assert np.isclose(
+                surfaces.treasuryRevenue[index], expectedRevenue, rtol=1e-9
+            )
@@ -0,0 +1,80 @@
+import numpy as np
+
+from helpers.lock_schedule import LockSchedule
+from helpers.vault_simulator import WEEK
+
+NOW = 100 * WEEK
+## uint112 amounts, over int64
+LOCKS = [
+    (3 * 10**30, NOW + 2 * WEEK),
+    (1 * 10**30, NOW + WEEK),
+    (2 * 10**30, NOW + 2 * WEEK),
+]
+UNLOCKABLE = 5
+
+
+def make_schedule():
+    return LockSchedule(
+        [amount for amount, _ in LOCKS],
+        [unlockTime for _, unlockTime in LOCKS],
+        UNLOCKABLE,
+    )
+
+
+def test_withdrawable_at():
+    schedule = make_schedule()
+    assert schedule.total == UNLOCKABLE + 6 * 10**30
+    assert schedule.withdrawable_at(NOW) == UNLOCKABLE
+    ## A lock is processable at its unlock time
+    assert schedule.withdrawable_at(NOW + WEEK - 1) == UNLOCKABLE
+    assert schedule.withdrawable_at(NOW + WEEK) == UNLOCKABLE + 10**30
+    assert schedule.withdrawable_at(NOW + 2 * WEEK) == schedule.total
+
+    withdrawable = schedule.withdrawable_at(
+        np.array([NOW, NOW + WEEK, NOW + 2 * WEEK - 1, NOW + 3 * WEEK])
+    )
+    assert list(withdrawable) == [
+        UNLOCKABLE,
+        UNLOCKABLE + 10**30,
+        UNLOCKABLE + 10**30,
+        schedule.total,
+    ]
+
+
+def test_unlocks_by_epoch():
+    schedule = make_schedule()
+    ## Epochs strictly after now, up to the horizon
+    epochs, cumulative = schedule.unlocks_by_epoch(NOW, 3 * WEEK)
+    assert list(epochs) == [NOW + WEEK, NOW + 2 * WEEK, NOW + 3 * WEEK]
+    assert list(cumulative) == [UNLOCKABLE + 10**30, schedule.total, schedule.total]
+
+    epochs, _ = schedule.unlocks_by_epoch(NOW + 1, 2 * WEEK)
+    assert list(epochs) == [NOW + WEEK, NOW + 2 * WEEK]
+
+
+def test_time_until():
+    schedule = make_schedule()
+    ## Already unlockable
+    assert schedule.time_until(0, NOW) == NOW
+    assert schedule.time_until(UNLOCKABLE, NOW) == NOW
+    ## Future unlocks
+    assert schedule.time_until(UNLOCKABLE + 1, NOW) == NOW + WEEK
+    assert schedule.time_until(UNLOCKABLE + 10**30, NOW) == NOW + WEEK
+    assert schedule.time_until(UNLOCKABLE + 10**30 + 1, NOW) == NOW + 2 * WEEK
+    assert schedule.time_until(schedule.total, NOW) == NOW + 2 * WEEK
+    ## Unlock times already past are now
+    assert schedule.time_until(schedule.total, NOW + 5 * WEEK) == NOW + 5 * WEEK
+    ## More than is locked
+    assert schedule.time_until(schedule.total + 1, NOW) is None
+
+
+def test_empty_schedule():
+    schedule = LockSchedule([], [])
+    assert len(schedule) == 0
+    assert schedule.total == 0
+    assert schedule.withdrawable_at(NOW) == 0
+    assert list(schedule.withdrawable_at(np.array([NOW, NOW + WEEK]))) == [0, 0]
+    epochs, cumulative = schedule.unlocks_by_epoch(NOW, 2 * WEEK)
+    assert list(cumulative) == [0] * len(epochs)
+    assert schedule.time_until(0, NOW) == NOW
+    assert schedule.time_until(1, NOW) is None
@@ -0,0 +1,54 @@
+from brownie import *
+from helpers.multicall import Call, Multicall, func, as_wei
+from helpers.rpc_batch import RPCBatch
+
+
+def test_multicall_tolerates_reverting_calls(vault, want):
+    calls = [
+        Call(vault.address, [func.erc20.totalSupply], [["sett.totalSupply", as_wei]]),
+        ## OXD has no getPricePerFullShare, so this call reverts
+        Call(
+            want.address,
+            [func.sett.getPricePerFullShare],
+            [["want.getPricePerFullShare", as_wei]],
+        ),
+    ]
+    multi = Multicall(calls, require_success=False)
+    data = multi()
+
+    assert data["sett.totalSupply"] == vault.totalSupply()
+    assert data["want.getPricePerFullShare"] is None
+    assert multi.success == [True, False]
+    assert multi.failed == ["want.getPricePerFullShare"]
+
+
+def test_multicall_coalesces_duplicate_calls(want, deployer):
+    calls = [
+        Call(want.address, [func.erc20.balanceOf, deployer], [[key, as_wei]])
+        for key in ["balances.want.user", "balances.want.deployer"]
+    ]
+    calls.append(
+        Call(want.address, [func.erc20.totalSupply], [["want.totalSupply", as_wei]])
+    )
+    multi = Multicall(calls)
+    data = multi()
+
+    assert multi.saved == 1
+    assert data["balances.want.user"] == data["balances.want.deployer"]
+    assert data["balances.want.user"] == want.balanceOf(deployer)
+    assert data["want.totalSupply"] == want.totalSupply()
+    assert multi.success == [True, True, True]
+
+
+def test_rpc_batch_reads_match_web3(vault, strategy, deployer):
+    batch = RPCBatch(batch_size=2)
+    batch.get_storage_at(vault.address, 0)
+    batch.get_storage_at(strategy.address, 0)
+    batch.get_balance(deployer.address)
+    batch.get_block(chain.height)
+    storageVault, storageStrategy, balance, block = batch.execute()
+
+    assert storageVault == web3.eth.getStorageAt(vault.address, 0).hex()
+    assert storageStrategy == web3.eth.getStorageAt(strategy.address, 0).hex()
+    assert int(balance, 16) == deployer.balance()
+    assert int(block["number"], 16) == chain.height
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from helpers.multicall import Call, Multicall, func, as_wei
+from helpers.multicall import multicall as multicall_module
+from helpers.multicall.multicall import calldata_size, is_limit_error
+
+TOKEN = "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d"
+HEAD = 1000
+
+
+class StubMulticall(Multicall):
+    """
+    Executes batches offline, outputs are each call's index, batches over limit are rejected
+    """
+
+    def __init__(self, calls, limit=None, **kwargs):
+        super().__init__(calls, max_workers=1, **kwargs)
+        self.limit = limit
+        self.executed = []
+
+    def execute(self, aggregate, batch, block_identifier):
+        if self.limit is not None and len(batch) > self.limit:
+            raise ValueError("execution reverted: out of gas")
+        self.executed.append((len(batch), block_identifier))
+        outputs = [
+            [True, int(data[4:].hex(), 16).to_bytes(32, "big")]
+            for target, data in batch
+        ]
+        return HEAD, outputs
+
+
+@pytest.fixture(autouse=True)
+def stub_web3(monkeypatch):
+    monkeypatch.setattr(
+        multicall_module,
+        "web3",
+        SimpleNamespace(eth=SimpleNamespace(chainId=250, block_number=HEAD)),
+    )
+
+
+def make_calls(count):
+    ## balanceOf(i) returns i, keys are out of order to check the merge
+    return [
+        Call(
+            TOKEN,
+            [func.erc20.balanceOf, "0x" + i.to_bytes(20, "big").hex()],
+            [["key" + str(count - i), as_wei]],
+        )
+        for i in range(count)
+    ]
+
+
+def test_batches_split_by_count():
+    multi = StubMulticall(make_calls(10), max_calls_per_batch=4)
+    batches = multi.batches(multi.requests())
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_batches_split_by_size():
+    calls = make_calls(10)
+    size = calldata_size(calls[0].data)
+    multi = StubMulticall(calls, max_calldata_size=3 * size)
+    batches = multi.batches(multi.requests())
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+
+
+def test_multicall_keeps_call_order_across_batches():
+    calls = make_calls(10)
+    multi = StubMulticall(calls, max_calls_per_batch=3)
+    data = multi()
+    assert list(data) == ["key" + str(10 - i) for i in range(10)]
+    assert [data["key" + str(10 - i)] for i in range(10)] == list(range(10))
+    ## Several batches are pinned to one block
+    assert {block for size, block in multi.executed} == {HEAD}
+
+
+def test_bisects_rejected_batches_at_one_block():
+    multi = StubMulticall(make_calls(8), limit=2)
+    data = multi()
+    assert [data["key" + str(8 - i)] for i in range(8)] == list(range(8))
+    assert [size for size, block in multi.executed] == [2, 2, 2, 2]
+    ## The single batch ran unpinned, its halves are pinned to the head
+    assert {block for size, block in multi.executed} == {HEAD}
+
+
+def test_limit_errors():
+    assert is_limit_error(ValueError("execution reverted: out of gas"))
+    assert is_limit_error(Exception("413 Client Error: Payload Too Large for url"))
+    assert is_limit_error(SimpleNamespace(response=SimpleNamespace(status_code=413)))
+    ## Revert data that happens to contain 413
+    assert not is_limit_error(ValueError("execution reverted: 0x08c379a0413"))
@@ -0,0 +1,56 @@
+from helpers.multicall.rpc import RPCError
+from helpers.rpc_batch import RPCBatch
+
+ADDRESS = "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d"
+
+
+class StubBatch(RPCBatch):
+    def __init__(self, answer, **kwargs):
+        super().__init__("http://localhost:8545", **kwargs)
+        self.answer = answer
+        self.sent = []
+
+    def post(self, batch):
+        self.sent.append(batch)
+        return self.answer(batch)
+
+
+def test_int_blocks_are_hex_tags():
+    batch = StubBatch(
+        lambda requests: [{"id": r["id"], "result": "0x1"} for r in requests]
+    )
+    batch.get_storage_at(ADDRESS, 1, 100)
+    batch.get_balance(ADDRESS, 100)
+    batch.get_block(100)
+    batch.get_balance(ADDRESS)
+
+    assert batch.execute() == ["0x1"] * 4
+    assert [request["params"][-1] for request in batch.sent[0][:2]] == ["0x64"] * 2
+    assert batch.sent[0][2]["params"][0] == "0x64"
+    assert batch.sent[0][3]["params"][-1] == "latest"
+
+
+def test_null_and_unknown_ids_are_errors():
+    error = {"code": -32600, "message": "invalid request"}
+    batch = StubBatch(
+        lambda requests: [
+            {"id": 1, "result": "0x2"},
+            {"id": None, "error": error},
+            {"id": 99, "result": "0x3"},
+        ]
+    )
+    batch.get_balance(ADDRESS, 1)
+    batch.get_balance(ADDRESS, 2)
+
+    results = batch.execute()
+    assert results[1] == "0x2"
+    assert isinstance(results[0], RPCError)
+    assert results[0].code == -32600
+
+
+def test_missing_response_is_an_error():
+    batch = StubBatch(lambda requests: [], batch_size=1)
+    batch.get_block(1)
+    results = batch.execute()
+    assert isinstance(results[0], RPCError)
+    assert str(results[0]) == "no response"
@@ -0,0 +1,104 @@
+import json
+
+import requests
+
+from helpers.rpc_recorder import NOT_RECORDED, RPCRecorder
+
+UPSTREAM = "http://upstream:8545"
+FORK_BLOCK = 1000
+BALANCE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "eth_getBalance",
+    "params": ["0xc5A9848b9d145965d821AaeC8fA32aaEE026492d", hex(FORK_BLOCK)],
+}
+
+
+class StubResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class StubUpstream:
+    """
+    Answers every request with its number, counts the requests it saw
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, json=None, timeout=None):
+        self.requests.append(json)
+        return StubResponse(
+            {"jsonrpc": "2.0", "id": json["id"], "result": hex(len(self.requests))}
+        )
+
+
+def make_recorder(path, mode="record"):
+    recorder = RPCRecorder(UPSTREAM, str(path), mode, FORK_BLOCK)
+    recorder.session = StubUpstream()
+    return recorder
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "rpc.sqlite"
+    recorder = make_recorder(path)
+    assert recorder.handle(BALANCE)["result"] == "0x1"
+    ## Served from the recording, with the request's id
+    assert recorder.handle(dict(BALANCE, id=7)) == {
+        "jsonrpc": "2.0",
+        "id": 7,
+        "result": "0x1",
+    }
+    assert len(recorder.session.requests) == 1
+    assert (recorder.hits, recorder.misses) == (1, 1)
+    recorder.close()
+
+    replay = make_recorder(path, "replay")
+    assert replay.handle(BALANCE)["result"] == "0x1"
+    assert replay.session.requests == []
+    replay.close()
+
+
+def test_replay_misses_are_errors(tmp_path):
+    replay = make_recorder(tmp_path / "rpc.sqlite", "replay")
+    response = replay.handle(BALANCE)
+    assert response["id"] == 1
+    assert response["error"]["code"] == NOT_RECORDED
+    assert replay.session.requests == []
+    replay.close()
+
+
+def test_volatile_and_latest_requests_are_not_recorded(tmp_path):
+    recorder = make_recorder(tmp_path / "rpc.sqlite")
+    latest = dict(BALANCE, params=[BALANCE["params"][0], "latest"])
+    gasPrice = {"jsonrpc": "2.0", "id": 2, "method": "eth_gasPrice", "params": []}
+    for payload in [latest, latest, gasPrice, gasPrice]:
+        recorder.handle(payload)
+
+    assert len(recorder.session.requests) == 4
+    assert recorder.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    recorder.close()
+
+
+def test_block_number_is_the_fork_block(tmp_path):
+    recorder = make_recorder(tmp_path / "rpc.sqlite", "replay")
+    payload = {"jsonrpc": "2.0", "id": 3, "method": "eth_blockNumber", "params": []}
+    assert recorder.handle(payload)["result"] == hex(FORK_BLOCK)
+    ## Batches are answered item by item
+    assert recorder.handle_body(json.dumps([payload, BALANCE]))[0]["result"] == hex(
+        FORK_BLOCK
+    )
+    recorder.close()
+
+
+def test_serve(tmp_path):
+    recorder = make_recorder(tmp_path / "rpc.sqlite")
+    url = recorder.serve()
+    try:
+        assert requests.post(url, json=BALANCE, timeout=10).json()["result"] == "0x1"
+    finally:
+        recorder.close()
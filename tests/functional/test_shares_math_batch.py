@@ -0,0 +1,32 @@
+import numpy as np
+from helpers import shares_math, shares_math_batch
+
+
+def test_batch_report_fees_match_scalar():
+    gains = [0, 1, 10**18, 123456789 * 10**18, 2**200]
+    performanceFees = np.array([0, 1000, 2000], dtype=np.int64)
+
+    fees = shares_math_batch.get_report_fees(
+        np.array(gains, dtype=object)[:, None],
+        performanceFees[None, :],
+        1000,
+        200,
+        7 * 24 * 3600,
+        10**24,
+        10**24 + 7,
+    )
+
+    for i, gain in enumerate(gains):
+        for j, performanceFee in enumerate(performanceFees):
+            expected = shares_math.get_report_fees(
+                gain,
+                int(performanceFee),
+                1000,
+                200,
+                7 * 24 * 3600,
+                10**24,
+                10**24 + 7,
+            )
+            assert fees.shares_perf_treasury[i, j] == expected.shares_perf_treasury
+            assert fees.shares_management[i, j] == expected.shares_management
+            assert fees.shares_perf_strategist[i, j] == expected.shares_perf_strategist
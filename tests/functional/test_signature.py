@@ -0,0 +1,75 @@
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
+
+from helpers.multicall.signature import encode_address, get_signature
+
+ADDRESS = "0x5E9B8d0a3D7b0FbBb0b8F3E2Ff7dF3a7d8c4a0B1"
+
+
+def test_no_argument_signatures_encode_to_the_selector():
+    for signature in ["totalSupply()(uint256)", "getPricePerFullShare()(uint256)"]:
+        sig = get_signature(signature)
+        selector = function_signature_to_4byte_selector(sig.function)
+        assert sig.encode_data() == selector
+        assert sig.encode_data([]) == selector
+
+
+def test_no_output_signatures_decode_to_empty_tuple():
+    sig = get_signature("transfer(address,uint256)()")
+    assert sig.decode_data(b"") == ()
+    assert sig.encode_data([ADDRESS, 10]) == sig.fourbyte + encode(
+        ["address", "uint256"], [ADDRESS, 10]
+    )
+
+
+def test_fast_encoders_match_eth_abi():
+    cases = [
+        ("balanceOf(address)(uint256)", ["address"], [ADDRESS]),
+        ("balanceOf(address)(uint256)", ["address"], [ADDRESS.lower()]),
+        ("sharesOf(uint256)(uint256)", ["uint256"], [0]),
+        ("sharesOf(uint256)(uint256)", ["uint256"], [2**256 - 1]),
+        (
+            "userInfo(uint256,address)(uint256,uint256)",
+            ["uint256", "address"],
+            [3, ADDRESS],
+        ),
+    ]
+    for signature, types, args in cases:
+        sig = get_signature(signature)
+        assert sig.encode_data(args) == sig.fourbyte + encode(types, args)
+
+
+def encode_or_error(encode, value):
+    try:
+        return encode(value)
+    except Exception as error:
+        return type(error)
+
+
+def test_fast_address_encoder_leaves_checksums_to_eth_abi():
+    body = ADDRESS[2:]
+    assert encode_address(["0x" + body.lower()]) is not None
+    assert encode_address(["0x" + body.upper()]) is not None
+    for value in [ADDRESS, "0X" + body.lower(), "00" + body.lower()]:
+        assert encode_address([value]) is None
+
+    sig = get_signature("balanceOf(address)(uint256)")
+    for value in [ADDRESS, "0x" + body.upper(), "0X" + body.lower(), "00" + body]:
+        assert encode_or_error(sig.encode_data, [value]) == encode_or_error(
+            lambda args: sig.fourbyte + encode(["address"], args), [value]
+        )
+
+
+def test_fast_decoders_match_eth_abi():
+    cases = [
+        ("decimals()(uint256)", ["uint256"], [18]),
+        ("decimals()(uint256)", ["uint256"], [2**256 - 1]),
+        ("isTendable()(bool)", ["bool"], [True]),
+        ("isTendable()(bool)", ["bool"], [False]),
+        ("token()(address)", ["address"], [ADDRESS]),
+        ("name()(string)", ["string"], ["Badger Vault"]),
+        ("userInfo(uint256,address)(uint256,uint256)", ["uint256", "uint256"], [1, 2]),
+    ]
+    for signature, types, values in cases:
+        output = encode(types, values)
+        assert get_signature(signature).decode_data(output) == decode(types, output)
@@ -0,0 +1,81 @@
+from helpers.SnapshotManager import SnapshotManager
+from helpers.snapshot.diff import SnapDiff
+from helpers.snapshot.snap import Snap, SnapSchema
+
+
+def make_pair():
+    schema = SnapSchema()
+    before = Snap(
+        {"sett.balance": 100, "sett.pool": 0, "sett.name": "a", "sett.fee": 10},
+        1,
+        [],
+        schema=schema,
+    )
+    after = Snap(
+        {"sett.balance": 150, "sett.pool": 5, "sett.name": "b", "sett.fee": 10},
+        2,
+        [],
+        schema=schema,
+    )
+    return before, after
+
+
+def test_diff_of_same_schema_snaps():
+    before, after = make_pair()
+    diff = SnapDiff(before, after)
+
+    assert len(diff) == 3
+    assert diff.keys() == ["sett.balance", "sett.pool", "sett.name"]
+    assert diff.indices == [0, 1, 2]
+    assert diff.deltas == [50, 5, None]
+    ## before == 0 has no relative change
+    assert diff.relatives == [0.5, None, None]
+
+
+def test_diff_of_different_schema_snaps():
+    before, _ = make_pair()
+    after = Snap(
+        {"sett.fee": 20, "sett.balance": 100, "sett.extra": 1},
+        2,
+        [],
+        schema=SnapSchema(),
+    )
+    diff = SnapDiff(before, after)
+
+    ## Keys missing after the snap compare as missing, keys only after it are ignored
+    assert diff.keys() == ["sett.pool", "sett.name", "sett.fee"]
+    assert diff.deltas == [None, None, 10]
+    assert diff.relatives == [None, None, 1.0]
+
+
+def test_render():
+    before, after = make_pair()
+    diff = SnapDiff(before, after)
+    assert diff.rows() == [
+        ["sett.balance", 100, 150, 50],
+        ["sett.pool", 0, 5, 5],
+        ["sett.name", "a", "b", "-"],
+    ]
+
+    rendered = diff.render(lambda key, value: "<{}>".format(value))
+    assert "metric" in rendered and "<150>" in rendered and "<->" in rendered
+    assert str(diff) == diff.render()
+
+
+def test_print_compare_returns_the_diff(capsys):
+    before, after = make_pair()
+    manager = SnapshotManager.__new__(SnapshotManager)
+    manager.key = "vault"
+    manager.verbose = False
+
+    diff = manager.printCompare(before, after)
+    assert isinstance(diff, SnapDiff)
+    assert diff.keys() == ["sett.balance", "sett.pool", "sett.name"]
+    assert capsys.readouterr().out == ""
+
+    manager.verbose = True
+    manager.fetchTokenMetadata = lambda: None
+    manager.format = lambda key, value: value
+    diff = manager.printCompare(before, after)
+    assert isinstance(diff, SnapDiff)
+    assert diff.render() in capsys.readouterr().out
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+from helpers.StrategyCoreResolver import StrategyCoreResolver
+
+WANT = "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d"
+SETT = "0x96D6a3b1e4B7C4F2B0D1A7e0C0cE1F4F3A1B2c3d"
+STRATEGY = "0x1111111111111111111111111111111111111111"
+OXSOLID = "0xDA0053F0bEfCbcaC208A3f867BB243716734D809"
+USER = "0x2222222222222222222222222222222222222222"
+OTHER = "0x3333333333333333333333333333333333333333"
+
+
+class StubStrategy:
+    address = STRATEGY
+
+    def __init__(self):
+        self.lookups = 0
+
+    def OXSOLID(self):
+        self.lookups += 1
+        return OXSOLID
+
+
+def make_manager():
+    return SimpleNamespace(
+        want=SimpleNamespace(address=WANT),
+        sett=SimpleNamespace(address=SETT),
+        strategy=StubStrategy(),
+    )
+
+
+class CountingResolver(StrategyCoreResolver):
+    """
+    Counts the entities the template builds calls for
+    """
+
+    def __init__(self, manager):
+        super().__init__(manager)
+        self.built = []
+        self.fieldBuilds = 0
+
+    def add_balances_snap(self, calls, entities):
+        self.built.extend(entities)
+        return super().add_balances_snap(calls, entities)
+
+    def add_sett_snap(self, calls):
+        self.fieldBuilds += 1
+        return super().add_sett_snap(calls)
+
+
+def test_calls_are_compiled_once():
+    resolver = CountingResolver(make_manager())
+    template = resolver.snap_template()
+    entities = {"sett": SETT, "strategy": STRATEGY}
+
+    calls = template.calls(entities)
+    assert template.calls(dict(entities)) is calls
+    assert resolver.built == ["sett", "strategy"]
+    assert resolver.fieldBuilds == 1
+    assert template.tokens == {"want": WANT, "sett": SETT}
+
+    ## Balances come first, token by token, then the fields
+    names = [call.returns[0][0] for call in calls]
+    assert names[:4] == [
+        "balances.want.sett",
+        "balances.want.strategy",
+        "balances.sett.sett",
+        "balances.sett.strategy",
+    ]
+    assert names[4] == "sett.balance"
+
+
+def test_tracked_users_only_compile_their_own_calls():
+    resolver = CountingResolver(make_manager())
+    template = resolver.snap_template()
+    entities = {"sett": SETT, "strategy": STRATEGY}
+    first = template.calls(entities)
+
+    withUser = template.calls(dict(entities, user=USER))
+    assert resolver.built == ["sett", "strategy", "user"]
+    assert resolver.fieldBuilds == 1
+    ## The calls of the other entities are the same objects
+    assert set(map(id, first)) <= set(map(id, withUser))
+    assert len(withUser) == len(first) + 2
+
+    moved = template.calls(dict(entities, user=OTHER))
+    assert resolver.built == ["sett", "strategy", "user", "user"]
+    assert [call.args[0] for call in moved if call.returns[0][0].endswith(".user")] == [
+        OTHER,
+        OTHER,
+    ]
+
+
+def test_oxsolid_is_looked_up_once(monkeypatch):
+    from _setup import StrategyResolver as strategyResolver
+
+    monkeypatch.setattr(
+        strategyResolver,
+        "interface",
+        SimpleNamespace(IERC20=lambda address: SimpleNamespace(address=address)),
+    )
+    manager = make_manager()
+    template = strategyResolver.StrategyResolver(manager).snap_template()
+
+    template.calls({"sett": SETT})
+    template.calls({"sett": SETT, "user": USER})
+    template.calls({"sett": SETT, "user": OTHER})
+    assert manager.strategy.lookups == 1
+    assert template.tokens["oxSolid"] == OXSOLID
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+
+from helpers.snapshot.export import SnapshotColumns, export_snaps
+from helpers.snapshot.snap import Snap, SnapSchema
+
+BIG = 2**200 + 2**64 + 7
+
+
+def make_snaps():
+    schema = SnapSchema()
+    ## Inserted out of order, rows are sorted by block
+    return {
+        12: Snap({"sett.balance": BIG, "sett.paused": True}, 12, [], schema=schema),
+        10: Snap({"sett.balance": 1, "sett.name": "bvlOXD"}, 10, [], schema=schema),
+        11: Snap({"sett.paused": False}, 11, [], schema=schema),
+    }
+
+
+def test_export_round_trip(tmp_path):
+    export_snaps(make_snaps(), str(tmp_path))
+    columns = SnapshotColumns(str(tmp_path))
+
+    assert len(columns) == 3
+    assert list(columns.blocks) == [10, 11, 12]
+    ## Only integer (and bool) keys are exported
+    assert columns.keys == ["sett.balance", "sett.paused"]
+
+    assert columns.as_int("sett.balance") == [1, None, BIG]
+    assert list(columns.valid("sett.balance")) == [True, False, True]
+    assert columns.as_int("sett.paused") == [None, 0, 1]
+
+    floats = columns.as_float("sett.balance")
+    assert floats[0] == 1.0
+    assert math.isnan(floats[1])
+    assert floats[2] == float(BIG)
+
+
+def test_columns_are_memory_mapped(tmp_path):
+    export_snaps(make_snaps(), str(tmp_path), keys=["sett.balance"])
+    columns = SnapshotColumns(str(tmp_path))
+
+    assert isinstance(columns.blocks, np.memmap)
+    limbs = columns.limbs("sett.balance")
+    assert isinstance(limbs, np.memmap)
+    assert limbs.shape == (3, 4)
+    assert [int(limb) for limb in limbs[2]] == [7, 1, 0, 2**8]
@@ -0,0 +1,101 @@
+import pytest
+from brownie import *
+from helpers.constants import MaxUint256
+from helpers.SnapshotManager import SnapshotManager
+from helpers.FleetSnapshotManager import FleetSnapshotManager
+from helpers.snapshot.history import SnapshotHistory
+from helpers.snapshot.snap import Snap, SnapSchema
+
+
+def test_snap_is_pinned_to_block_and_cached(vault, strategy, want, deployer):
+    snap = SnapshotManager(vault, strategy, "StrategySnapshot")
+    trackedUsers = {"user": deployer.address}
+
+    before = snap.snap(trackedUsers)
+    assert before.block == chain.height
+
+    want.approve(vault, MaxUint256, {"from": deployer})
+    vault.deposit(1000, {"from": deployer})
+
+    ## Re-snapping an older block doesn't re-query and sees the old state
+    assert snap.snap(trackedUsers, block=before.block) is before
+
+    after = snap.snap(trackedUsers)
+    assert after.block == before.block + 2
+    assert after.balances("want", "sett") == before.balances("want", "sett") + 1000
+
+
+def test_incremental_snap_matches_full_snap(vault, strategy, want, deployer):
+    snap = SnapshotManager(vault, strategy, "StrategySnapshot", incremental=True)
+    trackedUsers = {"user": deployer.address}
+    want.approve(vault, MaxUint256, {"from": deployer})
+
+    before = snap.snap(trackedUsers)
+    tx = vault.deposit(1000, {"from": deployer})
+    after = snap.snap(trackedUsers, previous=before, tx=tx)
+
+    full = SnapshotManager(vault, strategy, "StrategySnapshot").snap(trackedUsers)
+    assert after.data == full.data
+
+
+def test_incremental_snap_rereads_params_after_setter(
+    vault, strategy, want, deployer, governance
+):
+    snap = SnapshotManager(vault, strategy, "StrategySnapshot", incremental=True)
+    trackedUsers = {"user": deployer.address}
+    want.approve(vault, MaxUint256, {"from": deployer})
+
+    ## Deposits leave the fees alone, they're carried forward
+    before = snap.snap(trackedUsers)
+    tx = vault.deposit(1000, {"from": deployer})
+    after = snap.snap(trackedUsers, previous=before, tx=tx)
+    assert after.get("sett.withdrawalFee") == before.get("sett.withdrawalFee")
+
+    fee = vault.maxWithdrawalFee()
+    tx = vault.setWithdrawalFee(fee, {"from": governance})
+    changed = snap.snap(trackedUsers, previous=after, tx=tx)
+    assert changed.get("sett.withdrawalFee") == fee
+
+
+def test_snap_reads_params_once_until_setter(vault, strategy, governance):
+    snap = SnapshotManager(vault, strategy, "StrategySnapshot")
+    before = snap.snap()
+    assert snap.params.values["sett.withdrawalFee"][1] == before.get(
+        "sett.withdrawalFee"
+    )
+
+    fee = vault.maxWithdrawalFee()
+    tx = vault.setWithdrawalFee(fee, {"from": governance})
+    snap.observe(tx)
+    assert snap.snap().get("sett.withdrawalFee") == fee
+
+
+def test_fleet_snap_matches_manager_snap(vault, strategy, deployer):
+    trackedUsers = {"user": deployer.address}
+    fleet = FleetSnapshotManager({"vault": (vault, strategy)})
+    full = SnapshotManager(vault, strategy, "StrategySnapshot").snap(trackedUsers)
+
+    fleetSnap = fleet.snap(trackedUsers)
+    assert fleetSnap.block == full.block
+    assert fleetSnap.vault("vault").data == full.data
+    assert fleetSnap.vault("vault").entities == full.entities
+
+
+def test_snapshot_history_spills_and_reloads(tmp_path):
+    schema = SnapSchema()
+    history = SnapshotHistory(maxInMemory=2, spillDir=str(tmp_path), chunkSize=2)
+    for block in range(10):
+        history[block] = Snap({"sett.balance": block}, block, [], schema=schema)
+    history.pin(3)
+
+    assert list(history.memory) == [8, 9, 3]
+    assert len(history) == 10
+    assert [history[block].get("sett.balance") for block in history] == list(range(10))
+
+
+def test_pinning_an_unknown_block_pins_nothing():
+    history = SnapshotHistory(maxInMemory=1)
+    history[1] = Snap({"sett.balance": 1}, 1, [], schema=SnapSchema())
+    with pytest.raises(KeyError):
+        history.pin(2)
+    assert history.pinned == set()
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from helpers.multicall import Call, as_wei
+from helpers.snapshot.dirty import PARAMS
+from helpers.snapshot.params import ParamCache
+from helpers.StrategyCoreResolver import SETT_SNAP_FIELDS
+
+SETT = "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d"
+GOVERNANCE = "0xDA0053F0bEfCbcaC208A3f867BB243716734D809"
+
+
+def make_calls():
+    return [
+        Call(SETT, [function], [[key, as_wei]]) for key, function in SETT_SNAP_FIELDS
+    ]
+
+
+def make_tx(receiver=GOVERNANCE, input="0x", logs=()):
+    return SimpleNamespace(sender=GOVERNANCE, receiver=receiver, input=input, logs=logs)
+
+
+def read(params, block):
+    calls, cached = params.split(make_calls(), block)
+    data = {call.returns[0][0]: 1 for call in calls}
+    params.update(data, [], block)
+    return [call.returns[0][0] for call in calls], cached
+
+
+def test_params_are_read_once():
+    params = ParamCache([SETT])
+    keys, cached = read(params, 10)
+    assert cached == {}
+    assert set(PARAMS) <= set(keys)
+
+    keys, cached = read(params, 11)
+    assert set(cached) == set(PARAMS)
+    assert not set(PARAMS) & set(keys)
+    ## Older blocks than the one they were read at read them again
+    keys, cached = read(params, 9)
+    assert cached == {}
+
+
+def test_setter_event_and_selector_drop_params():
+    params = ParamCache([SETT])
+    read(params, 10)
+
+    ## Deposits don't touch the fees
+    params.observe(make_tx(SETT, "0xb6b55f25" + "00" * 32))
+    assert set(params.values) == set(PARAMS)
+
+    topic, _ = PARAMS["sett.managementFee"]
+    params.observe(make_tx(logs=[{"address": SETT, "topics": [topic]}]))
+    assert "sett.managementFee" not in params.values
+
+    _, selector = PARAMS["sett.withdrawalFee"]
+    params.observe(make_tx(SETT, "0x" + selector.hex() + "00" * 32))
+    assert "sett.withdrawalFee" not in params.values
+
+    keys, cached = read(params, 11)
+    assert {"sett.managementFee", "sett.withdrawalFee"} <= set(keys)
+    assert "sett.decimals" in cached
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from helpers import token_metadata
+from helpers.token_metadata import DEFAULT_DECIMALS, TokenMetadata
+from helpers.utils import val
+
+OXD = "0xc5A9848b9d145965d821AaeC8fA32aaEE026492d"
+USDC = "0x04068DA6C83AFCFA0e13ba15A6696662335D5B75"
+## An EOA, every view reverts
+NOT_A_TOKEN = "0xDA0053F0bEfCbcaC208A3f867BB243716734D809"
+TOKENS = {
+    OXD: {"decimals": 18, "symbol": "OXD", "name": "0xDAO"},
+    USDC: {"decimals": 6, "symbol": "USDC", "name": "USD Coin"},
+}
+
+
+class StubMulticall:
+    """
+    Answers from TOKENS, None (the failure default) for anything else
+    """
+
+    instances = []
+
+    def __init__(self, calls, require_success=True):
+        self.calls = calls
+        StubMulticall.instances.append(self)
+
+    def __call__(self):
+        data = {}
+        for call in self.calls:
+            name = call.returns[0][0]
+            token, field = name.rsplit(".", 1)
+            data[name] = TOKENS.get(token, {}).get(field)
+        return data
+
+
+def stub_multicall(monkeypatch):
+    StubMulticall.instances = []
+    monkeypatch.setattr(token_metadata, "Multicall", StubMulticall)
+
+
+def test_tokens_are_fetched_in_one_multicall(monkeypatch):
+    stub_multicall(monkeypatch)
+    metadata = TokenMetadata(None)
+    metadata.fetch([OXD, USDC.lower(), NOT_A_TOKEN])
+
+    assert len(StubMulticall.instances) == 1
+    assert len(StubMulticall.instances[0].calls) == 9
+    assert metadata.decimals(USDC) == 6
+    assert metadata.symbol(OXD) == "OXD"
+    assert USDC.lower() in metadata
+
+    ## Cached, nothing is read again
+    metadata.fetch([OXD, USDC])
+    metadata.name(NOT_A_TOKEN)
+    assert len(StubMulticall.instances) == 1
+
+
+def test_reverting_tokens_default_to_18_decimals(monkeypatch):
+    stub_multicall(monkeypatch)
+    metadata = TokenMetadata(None)
+    assert metadata.decimals(NOT_A_TOKEN) == DEFAULT_DECIMALS
+    assert metadata.symbol(NOT_A_TOKEN) is None
+
+
+def test_metadata_persists_to_json(monkeypatch, tmp_path):
+    stub_multicall(monkeypatch)
+    path = str(tmp_path / "tokens" / "metadata.json")
+    TokenMetadata(path).fetch([OXD, NOT_A_TOKEN])
+
+    reloaded = TokenMetadata(path)
+    assert reloaded.tokens[OXD] == TOKENS[OXD]
+    assert reloaded.decimals(NOT_A_TOKEN) == DEFAULT_DECIMALS
+    assert len(StubMulticall.instances) == 1
+
+
+def test_format_only_scales_token_amounts(monkeypatch):
+    from helpers.SnapshotManager import SnapshotManager
+
+    monkeypatch.setitem(token_metadata.tokenMetadata.tokens, OXD, TOKENS[OXD])
+    monkeypatch.setitem(token_metadata.tokenMetadata.tokens, USDC, TOKENS[USDC])
+    manager = SnapshotManager.__new__(SnapshotManager)
+    manager.template = SimpleNamespace(tokens={"want": OXD, "usdc": USDC})
+    manager.want = SimpleNamespace(address=OXD)
+    manager.sett = SimpleNamespace(address=OXD)
+
+    assert manager.format("balances.want.user", 10**18) == val(10**18, 18)
+    assert manager.format("balances.usdc.user", 10**6) == val(10**18, 18)
+    assert manager.format("sett.balance", 5 * 10**17) == val(5 * 10**17, 18)
+    ## Fees and timestamps aren't token amounts
+    assert manager.format("sett.withdrawalFee", 50) == 50
+    assert manager.format("sett.lastHarvestedAt", 1650000000) == 1650000000
+    assert manager.format("sett.performanceFeeGovernance", 2000) == 2000
+    assert manager.format("sett.name", "bvlOXD") == "bvlOXD"
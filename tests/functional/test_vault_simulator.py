@@ -0,0 +1,31 @@
+from brownie import *
+from helpers.constants import MaxUint256
+from helpers.SnapshotManager import SnapshotManager
+from helpers.vault_differential import differential
+from helpers.vault_simulator import WEEK
+
+
+def test_simulator_matches_chain(vault, strategy, want, deployer, governance):
+    snap = SnapshotManager(vault, strategy, "StrategySnapshot", verbose=False)
+    want.approve(vault, MaxUint256, {"from": deployer})
+    depositAmount = want.balanceOf(deployer) // 4
+
+    scenarios = [
+        [
+            ("deposit", "user", depositAmount),
+            ("earn",),
+            ("sleep", WEEK),
+            ("harvest",),
+            ("withdraw", "user", depositAmount // 100),
+        ],
+        [
+            ("deposit", "user", depositAmount),
+            ("earn",),
+            ## Locked, can't be withdrawn yet
+            ("withdrawAll", "user"),
+            ("sleep", 17 * WEEK),
+            ("withdrawAll", "user"),
+        ],
+    ]
+
+    assert differential(snap, scenarios, {"user": deployer}, governance, sample=1) == {}